@@ -356,10 +356,9 @@ class HP8712B(SCPI.SCPIDevice):
         fmt=funcargparse.getdefault(fmt,self.data_fmt)
         self.set_data_format(fmt)
         if source=="data":
-            data=self.ask(":TRACE:DATA? CH{0}FDATA".format(self.channel),"raw")
+            return self.ask_trace_data(":TRACE:DATA? CH{0}FDATA".format(self.channel),fmt)
         elif source=="memory":
-            data=self.ask(":TRACE:DATA? CH{0}FDMEM".format(self.channel),"raw")
-        return self.parse_trace_data(data,fmt)
+            return self.ask_trace_data(":TRACE:DATA? CH{0}FDMEM".format(self.channel),fmt)
             
             
     def read_sweep(self, transfer_fmt="xy"):
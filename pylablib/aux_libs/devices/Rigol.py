@@ -130,8 +130,7 @@ class DSA1030A(SCPI.SCPIDevice):
     def request_data(self, fmt=None):
         fmt=funcargparse.getdefault(fmt,self.data_fmt)
         self.set_data_format(fmt)
-        data=self.ask(":TRACE:DATA? TRACE{0}".format(self.channel),"raw")
-        return self.parse_trace_data(data,fmt)
+        return self.ask_trace_data(":TRACE:DATA? TRACE{0}".format(self.channel),fmt)
             
     def read_sweep(self):
         pts=self.get_sweep_points()
@@ -177,8 +177,7 @@ class ITektronixScope(SCPI.SCPIDevice):
     def request_data(self, fmt=None):
         fmt=funcargparse.getdefault(fmt,self.data_fmt)
         self.set_data_format(fmt)
-        data=self.ask(":CURVE?","raw")
-        return self.parse_trace_data(data,fmt)
+        return self.ask_trace_data(":CURVE?",fmt)
     def _scale_data(self, data, wfmpre=None):
         wfmpre=wfmpre or self.get_wfmpre()
         xpts=(np.arange(len(data))-wfmpre["ptoff"])*wfmpre["xincr"]+wfmpre["xzero"]
@@ -197,8 +196,7 @@ class ITektronixScope(SCPI.SCPIDevice):
     def _read_sweep_fast(self, channel, wfmpre=None):
         self.write(":DATA:SOURCE CH{}".format(channel))
         wfmpre=wfmpre or self.get_wfmpre()
-        data=self.ask(":CURVE?","raw")
-        trace=self.parse_trace_data(data,wfmpre["fmt"].to_desc())
+        trace=self.ask_trace_data(":CURVE?",wfmpre["fmt"].to_desc())
         if len(trace)!=wfmpre["pts"]:
             raise RuntimeError("received data length {0} is not equal to the number of points {1}".format(len(trace),wfmpre["pts"]))
         return self._scale_data(trace,wfmpre)
@@ -481,8 +479,7 @@ class MDO3000(SCPI.SCPIDevice):
         fmt=self._get_default_data_format(fmt)
         if set_fmt:
             self.set_data_format(fmt)
-        data=self.ask(":CURVE?","raw")
-        return self.parse_trace_data(data,fmt)
+        return self.ask_trace_data(":CURVE?",fmt)
     
     def _scale_time_data(self, data):
         xzero=self.ask(":{}:XZERO?".format(self._wfmpre),"float")
@@ -9,6 +9,7 @@ each of which is prepended by two 4-byte integers denoting the frame dimensions.
 from ...core.utils import files as file_utils
 
 import os.path
+import multiprocessing
 import numpy as np
 
 
@@ -30,29 +31,114 @@ def _read_cam_frame(f, skip=False):
         f.seek(w*h*2,1)
         return None
 
+def _build_cam_offsets(path, start=0):
+    """
+    Build the array of frame offsets for a .cam file (the last element is the end of the last frame).
+
+    `start` is the offset of the first frame to scan (the first element of the result).
+
+    Frame headers are checked in batches (under the assumption that consecutive frames usually have the same size),
+    so most of the index is built with vectorized operations without reading the frames data.
+    The last incomplete frame (e.g., if it is still being written) is not included.
+    """
+    file_size=os.path.getsize(path)
+    if file_size<start+8:
+        return np.array([start],dtype="i8")
+    data=np.memmap(path,dtype="u1",mode="r")
+    min_batch=16
+    offsets=[np.array([start],dtype="i8")]
+    pos,batch=start,min_batch
+    header_bytes=np.arange(8)
+    while file_size-pos>=8:
+        w,h=data[pos:pos+8].view("<u4")
+        frame_size=8+2*int(w)*int(h)
+        nmax=min((file_size-pos)//frame_size,batch)
+        if nmax==0:
+            break
+        candidates=pos+frame_size*np.arange(nmax,dtype="i8")
+        headers=data[candidates[:,None]+header_bytes].view("<u4")
+        matched=(headers[:,0]==w)&(headers[:,1]==h)
+        nmatched=nmax if matched.all() else int(np.argmin(matched))
+        pos+=frame_size*nmatched
+        offsets.append(candidates[:nmatched]+frame_size)
+        batch=batch*2 if nmatched==nmax else min_batch
+    del data
+    return np.concatenate(offsets)
+
 class CamReader(object):
     """
     Reader class for .cam files.
 
     Allows transparent access to frames by reading them from the file on the fly (without loading the whole file).
     Supports determining length, indexing (only positive single-element indices) and iteration.
+    If all frames have the same shape, slicing returns a 3D array view backed by the memory-mapped file (see :meth:`get_frames_view`);
+    otherwise, it returns a list of frames.
+    The file is kept open between the calls; use :meth:`close` (or use the reader as a context manager) to close it.
 
     Args:
         path(str): path to .cam file.
         same_size(bool): if ``True``, assume that all frames have the same size, which speeds up random access and obtaining number of frames;
-            otherwise, the first time the length is determined or a large-index frame is accessed can take a long time (all subsequent calls are faster).
+            otherwise, the first time the length is determined or a frame beyond the known range is accessed, the frame index is built.
+        index_file(str): path to the file for storing the frame index, so that it doesn't need to be rebuilt for the subsequent readers
+            (the index is only used if the .cam file size and modification time didn't change).
+            If ``"auto"``, use the .cam file path with the added ``".idx"`` extension; if ``None`` (default), don't store the index.
     """
-    def __init__(self, path, same_size=False):
+    def __init__(self, path, same_size=False, index_file=None):
         object.__init__(self)
         self.path=path
         self.frame_offsets=[0]
         self.frames_num=None
         self.same_size=same_size
+        self.index_file=path+".idx" if index_file=="auto" else index_file
+        self._file=None
+        self._mmap=None
+        self._frames_view=None
+
+    def _get_file(self):
+        if self._file is None:
+            self._file=open(self.path,"rb")
+        return self._file
+    def _get_mmap(self):
+        file_size=os.path.getsize(self.path)
+        if self._mmap is None or len(self._mmap)<file_size:
+            self._mmap=np.memmap(self.path,dtype="u1",mode="r")
+        return self._mmap
+    def close(self):
+        """Close the file"""
+        if self._file is not None:
+            self._file.close()
+            self._file=None
+        self._mmap=None
+        self._frames_view=None
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+
+    def _load_index(self):
+        if self.index_file is None or not os.path.exists(self.index_file):
+            return None
+        try:
+            with open(self.index_file,"rb") as f:
+                index=np.load(f)
+                if index["file_size"]!=os.path.getsize(self.path) or index["mtime"]!=os.path.getmtime(self.path):
+                    return None
+                return index["offsets"]
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+    def _save_index(self, offsets):
+        if self.index_file is None:
+            return
+        try:
+            with open(self.index_file,"wb") as f:
+                np.savez(f,offsets=offsets,file_size=os.path.getsize(self.path),mtime=os.path.getmtime(self.path))
+        except (IOError, OSError):
+            pass
 
     def _read_frame_at(self, offset):
-        with open(self.path,"rb") as f:
-            f.seek(offset)
-            return _read_cam_frame(f)
+        f=self._get_file()
+        f.seek(int(offset))
+        return _read_cam_frame(f)
     def _read_next_frame(self, f, skip=False):
         data=_read_cam_frame(f,skip=skip)
         self.frame_offsets.append(f.tell())
@@ -61,21 +147,32 @@ class CamReader(object):
         idx=int(idx)
         if self.same_size:
             if len(self.frame_offsets)==1:
-                with open(self.path,"rb") as f:
-                    self._read_next_frame(f,skip=True)
+                f=self._get_file()
+                f.seek(0)
+                self._read_next_frame(f,skip=True)
             offset=self.frame_offsets[1]*idx
             return self._read_frame_at(offset)
         else:
-            if idx<len(self.frame_offsets):
-                return self._read_frame_at(self.frame_offsets[idx])
-            next_idx=len(self.frame_offsets)-1
-            offset=self.frame_offsets[-1]
-            with open(self.path,"rb") as f:
-                f.seek(offset)
-                while next_idx<=idx:
-                    data=self._read_next_frame(f,next_idx<idx)
-                    next_idx+=1
-            return data
+            if idx>=len(self.frame_offsets)-1:
+                if self.frames_num is None:
+                    self._fill_offsets()
+                else: # the file might have been extended since the last scan
+                    self._extend_offsets()
+                if idx>=self.frames_num:
+                    raise StopIteration
+            return self._read_frame_at(self.frame_offsets[idx])
+
+    def _set_offsets(self, offsets):
+        """Set the frame offsets (e.g., obtained from another reader), so that the index doesn't need to be rebuilt"""
+        self.frame_offsets=np.asarray(offsets)
+        self.frames_num=len(self.frame_offsets)-1
+        self._frames_view=None
+    def _extend_offsets(self):
+        offsets=_build_cam_offsets(self.path,int(self.frame_offsets[-1]))
+        if len(offsets)>1:
+            self.frame_offsets=np.concatenate((self.frame_offsets[:-1],offsets))
+            self.frames_num=len(self.frame_offsets)-1
+            self._frames_view=None
 
     def _fill_offsets(self):
         if self.frames_num is not None:
@@ -85,30 +182,96 @@ class CamReader(object):
             if file_size==0:
                 self.frames_num=0
             else:
-                with open(self.path,"rb") as f:
-                    self._read_next_frame(f,skip=True)
+                f=self._get_file()
+                f.seek(0)
+                self._read_next_frame(f,skip=True)
                 if file_size%self.frame_offsets[1]:
                     raise IOError("File size {} is not a multiple of single frame size {}".format(file_size,self.frame_offsets[1]))
                 self.frames_num=file_size//self.frame_offsets[1]
         else:
-            offset=self.frame_offsets[-1]
-            try:
-                with open(self.path,"rb") as f:
-                    f.seek(offset)
-                    while True:
-                        self._read_next_frame(f,skip=True)
-            except StopIteration:
-                pass
+            offsets=self._load_index()
+            if offsets is None:
+                offsets=_build_cam_offsets(self.path)
+                self._save_index(offsets)
+            self.frame_offsets=offsets
             self.frames_num=len(self.frame_offsets)-1
     
+    def _refresh_offsets(self):
+        """Build the frame index, or update the number of frames if the file has been extended since the last scan"""
+        if self.frames_num is None:
+            self._fill_offsets()
+        elif self.same_size:
+            if len(self.frame_offsets)==1: # the file was empty on the last check
+                self.frames_num=None
+                self._fill_offsets()
+            else:
+                frames_num=os.path.getsize(self.path)//self.frame_offsets[1]
+                if frames_num!=self.frames_num:
+                    self.frames_num=frames_num
+                    self._frames_view=None
+        else:
+            self._extend_offsets()
     def size(self):
-        """Get the total number of frames"""
-        self._fill_offsets()
+        """
+        Get the total number of frames.
+
+        The file is rescanned starting from the last known frame, so the frames appended since the previous call are included.
+        """
+        self._refresh_offsets()
         return self.frames_num
     __len__=size
 
+    def _get_uniform_frames_view(self):
+        """Get frames view if all frames have the same shape, or ``None`` otherwise"""
+        if self._frames_view is None:
+            self._fill_offsets()
+            if self.frames_num==0:
+                self._frames_view=np.zeros((0,0,0),dtype="<u2")
+            else:
+                if self.same_size:
+                    frame_size=self.frame_offsets[1]
+                    offsets=np.arange(self.frames_num,dtype="i8")*frame_size
+                else:
+                    offsets=np.asarray(self.frame_offsets[:-1])
+                    frame_size=self.frame_offsets[1]-self.frame_offsets[0]
+                    if np.any(np.diff(self.frame_offsets)!=frame_size):
+                        return None
+                data=self._get_mmap()
+                headers=data[offsets[:,None]+np.arange(8)].view("<u4")
+                if np.any(headers!=headers[0]):
+                    return None
+                w,h=[int(s) for s in headers[0]]
+                self._frames_view=np.ndarray((self.frames_num,w,h),dtype="<u2",buffer=data,offset=int(offsets[0])+8,strides=(int(frame_size),2*h,2))
+        return self._frames_view
+    def get_frames_view(self):
+        """
+        Get all frames as a read-only 3D array (frames x width x height) backed by the memory-mapped file.
+
+        No data is copied, and only the accessed frames are read from the disk.
+        Only works if all the frames have the same shape; otherwise, raise :exc:`IOError`.
+        """
+        view=self._get_uniform_frames_view()
+        if view is None:
+            raise IOError("frames have different shapes")
+        return view
+    def read_range(self, start=0, stop=None, step=1):
+        """
+        Read frames starting with `start` ending at `stop` (``None`` means until the end of file) with the given `step`.
+
+        Return a single 3D array (frames x width x height); all the frames in the range should have the same shape.
+        """
+        view=self._get_uniform_frames_view()
+        if view is not None:
+            return np.array(view[start:stop:step])
+        frames=list(self.iterrange(start,stop,step))
+        if any(f.shape!=frames[0].shape for f in frames):
+            raise IOError("frames in the range have different shapes")
+        return np.array(frames)
     def __getitem__(self, idx):
         if isinstance(idx,slice):
+            view=self._get_uniform_frames_view()
+            if view is not None:
+                return view[idx]
             return list(self.iterrange(idx.start or 0,idx.stop,idx.step or 1))
         try:
             return self._read_frame(idx)
@@ -159,8 +322,11 @@ def iter_cam_frames(path, start=0, step=1):
 
     Yield 2D array (one array per frame).
     Frames are loaded only when yielded, so the function is suitable for large files.
+    The file is closed once the iteration is finished (or the generator is closed).
     """
-    return CamReader(path).iterrange(start,None,step)
+    with CamReader(path) as reader:
+        for frame in reader.iterrange(start,None,step):
+            yield frame
 def load_cam(path, same_size=True):
     """
     Load .cam datafile.
@@ -169,10 +335,11 @@ def load_cam(path, same_size=True):
     If ``same_size==True``, raise error if different frames have different size.
     """
     frames=[]
-    for f in iter_cam_frames(path):
-        if same_size and frames and f.shape!=frames[0].shape:
-            raise IOError("camera frame {} has a different size: {}x{} instead of {}x{}".format(len(frames),*(f.shape+frames[0].shape)))
-        frames.append(f)
+    with CamReader(path) as reader:
+        for f in reader:
+            if same_size and frames and f.shape!=frames[0].shape:
+                raise IOError("camera frame {} has a different size: {}x{} instead of {}x{}".format(len(frames),*(f.shape+frames[0].shape)))
+            frames.append(f)
     return frames
 def combine_cam_frames(path, func, init=None, start=0, step=1, max_frames=None, return_total=False):
     """
@@ -185,14 +352,126 @@ def combine_cam_frames(path, func, init=None, start=0, step=1, max_frames=None,
     """
     n=0
     result=init
-    for f in iter_cam_frames(path,start=start,step=step):
-        if result is None:
-            result=f
+    with CamReader(path) as reader:
+        for f in reader.iterrange(start,None,step):
+            if result is None:
+                result=f
+            else:
+                result=func(result,f)
+            n+=1
+            if max_frames and n>=max_frames:
+                break
+    return (result,n) if return_total else result
+
+
+
+##### Parallel frames reduction #####
+def _reduce_var(frames):
+    mean=frames.mean(axis=0)
+    return (len(frames),mean,((frames-mean)**2).sum(axis=0))
+def _merge_var(a, b):
+    (na,ma,m2a),(nb,mb,m2b)=a,b
+    n=na+nb
+    delta=mb-ma
+    return (n,ma+delta*(nb/float(n)),m2a+m2b+delta**2*(na*nb/float(n)))
+_builtin_reducers={ # reducer: (batch reduction, partial results merge, final result)
+    "sum":( lambda frames: frames.sum(axis=0,dtype="f8"), np.add, lambda r: r ),
+    "mean":( lambda frames: (len(frames),frames.sum(axis=0,dtype="f8")), lambda a,b: (a[0]+b[0],a[1]+b[1]), lambda r: r[1]/r[0] ),
+    "var":( lambda frames: _reduce_var(frames.astype("f8")), _merge_var, lambda r: r[2]/r[0] ),
+    "min":( lambda frames: frames.min(axis=0), np.minimum, lambda r: r ),
+    "max":( lambda frames: frames.max(axis=0), np.maximum, lambda r: r ),
+}
+
+def _combine_cam_range(args):
+    """
+    Combine frames in the range ``[start, stop)`` with the given `step` (executed in a worker process).
+
+    If `offsets` is not ``None``, it contains the frame offsets for the frames in the range (plus the end of the last frame),
+    so that the worker doesn't need to rebuild the frame index.
+    Return tuple ``(result, n)``, where `n` is the number of combined frames.
+    For built-in reducers, `result` is a partial (not finalized) reducer result.
+    """
+    path,same_size,offsets,start,stop,step,func,init,batch_size=args
+    n=0
+    result=init
+    with CamReader(path,same_size=same_size) as reader:
+        if offsets is not None:
+            reader._set_offsets(offsets)
+            start,stop=0,stop-start
+        if func in _builtin_reducers:
+            reduce_batch,merge,_=_builtin_reducers[func]
+            for batch_start in range(start,stop,step*batch_size):
+                frames=reader.read_range(batch_start,min(batch_start+step*batch_size,stop),step)
+                if len(frames):
+                    partial=reduce_batch(frames)
+                    result=partial if result is None else merge(result,partial)
+                    n+=len(frames)
         else:
-            result=func(result,f)
-        n+=1
-        if max_frames and n>=max_frames:
-            break
+            for f in reader.iterrange(start,stop,step):
+                result=f if result is None else func(result,f)
+                n+=1
+    return result,n
+def combine_cam_frames_parallel(path, func, merge=None, init=None, start=0, stop=None, step=1, max_frames=None, return_total=False,
+        processes=None, chunks_per_process=4, batch_size=64, same_size=False, index_file=None):
+    """
+    Combine .cam frames using the function `func` in several processes.
+
+    The frames range is split into contiguous chunks, which are combined independently in a pool of worker processes
+    (each worker reads only its own part of the file using the part of the frame index built in the main process);
+    the partial results are then combined with `merge` in the order of chunks.
+    `func` can be one of the built-in reducers (``"sum"``, ``"mean"``, ``"var"``, ``"min"`` or ``"max"``),
+    which process frames in batches of `batch_size` frames using vectorized numpy operations (`merge` and `init` are ignored in this case);
+    all the frames should have the same shape.
+    Otherwise, `func` takes 2 arguments (the accumulated result and a new frame) and returns the combined result,
+    and `merge` takes 2 accumulated results and returns the combined result (by default, same as `func`).
+    `init` is the initial result value for each chunk; if ``init is None`` it is initialized to the first frame of the chunk.
+    Custom `func` and `merge` should be picklable (e.g., defined at a module level).
+    If `max_frames` is not ``None``, it specifies the maximal number of frames to read.
+    If ``return_total==True'``, return a tuple ``(result, n)'``, where `n` is the total number of frames.
+    `processes` specifies number of worker processes (by default, the number of CPUs); if it is 1, combine all frames in the current process.
+    `same_size` and `index_file` are passed to :class:`CamReader`.
+    """
+    builtin=func in _builtin_reducers
+    if builtin:
+        merge=_builtin_reducers[func][1]
+    elif merge is None:
+        merge=func
+    with CamReader(path,same_size=same_size,index_file=index_file) as reader:
+        nframes=len(reader) # build the index once, so that the workers don't need to rescan the file
+        offsets=None if same_size else np.asarray(reader.frame_offsets)
+    stop=nframes if stop is None else min(stop,nframes)
+    if max_frames:
+        stop=min(stop,start+max_frames*step)
+    frames=range(start,max(stop,start),step)
+    if processes is None:
+        processes=multiprocessing.cpu_count()
+    nchunks=max(min(processes*chunks_per_process,len(frames)),1) if processes>1 else 1
+    bounds=[len(frames)*i//nchunks for i in range(nchunks+1)]
+    tasks=[]
+    for b0,b1 in zip(bounds[:-1],bounds[1:]):
+        if b1>b0:
+            chunk_stop=frames[b1] if b1<len(frames) else stop
+            chunk_offsets=None if offsets is None else offsets[frames[b0]:chunk_stop+1]
+            tasks.append((path,same_size,chunk_offsets,frames[b0],chunk_stop,step,func,None if builtin else init,batch_size))
+    if processes>1 and len(tasks)>1:
+        pool=multiprocessing.Pool(processes)
+        try:
+            partials=pool.map(_combine_cam_range,tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        partials=[_combine_cam_range(t) for t in tasks]
+    result=None
+    n=0
+    for r,rn in partials:
+        if rn:
+            result=r if result is None else merge(result,r)
+            n+=rn
+    if builtin:
+        result=None if result is None else _builtin_reducers[func][2](result)
+    elif result is None:
+        result=init
     return (result,n) if return_total else result
 
 
@@ -5,7 +5,12 @@ from ...core.fileio import binio
 import numpy as np
 import numpy.random
 
-import time, collections, os.path, zlib, pickle
+import time, collections, os.path, zlib, pickle, io, threading
+import multiprocessing.pool
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
 
 
 def gen_uid():
@@ -53,6 +58,7 @@ class ECamFrame(object):
 
 current_version=0x0001
 valid_magic=b"eCAM\x0f64\x0b"
+index_magic=b"eCAMidx\x0b"
 valid_versions=[0x0001]
 default_pickle_proto=3
 _header_fields=[("header_size",4),("image_bytes",8),("version",2),("magic",8),("shape",16),("dtype",2),("stype",2),
@@ -319,7 +325,7 @@ class ECamFormatter(object):
             f.write(valid_magic)
             if None not in header.shape:
                 shape=header.shape+(0,)*(4-len(header.shape))
-                np.asarray(shape,dtype="u4").astype("<u4").tofile(f)
+                f.write(np.asarray(shape,dtype="u4").astype("<u4").tobytes())
             else:
                 return
             if header.dtype is not None:
@@ -344,11 +350,11 @@ class ECamFormatter(object):
                     self._write_block(f,btype,bvalue)
     def _write_image(self, header, data, f):
         if data is None:
-            f.write("\x00"*header.image_bytes)
+            f.write(b"\x00"*header.image_bytes)
         elif isinstance(data,bytes):
             f.write(data)
         elif isinstance(data,np.ndarray):
-            data.tofile(f)
+            f.write(np.ascontiguousarray(data).data)
         else:
             raise ValueError("don't know how to write data {}".format(data))
     def write_frame(self, frame, f):
@@ -366,19 +372,270 @@ class ECamFormatter(object):
 
 
 
-def save_ecam(frames, path, append=True, formatter=None):
+def _check_frame_sizes(data, pos, end):
+    """
+    Check the header of the frame at the position `pos` within the memory-mapped file `data` (with the data ending at `end`).
+
+    Return tuple ``(header_size, image_bytes)``, or ``None`` if the header is incomplete.
+    """
+    header_size=int(data[pos:pos+4].view("<u4")[0])
+    if header_size in {0,4} or (header_size<_hf_offsets["__end__"] and header_size not in _hf_offsets.values()):
+        raise ECamFormatError("bad file format: header size is {}".format(header_size))
+    image_bytes=int(data[pos+4:pos+12].view("<u8")[0])
+    if header_size>_hf_offsets["version"]:
+        if end-pos<_hf_offsets["magic"]:
+            return None
+        version=int(data[pos+12:pos+14].view("<u2")[0])
+        if version not in valid_versions:
+            raise ECamFormatError("bad file format: unsupported version 0x{:02x}".format(version))
+    if header_size>_hf_offsets["magic"]:
+        if end-pos<_hf_offsets["shape"]:
+            return None
+        if np.any(data[pos+14:pos+22]!=np.frombuffer(valid_magic,"u1")):
+            raise ECamFormatError("bad file format: invalid magic {}".format(py3.as_bytes(data[pos+14:pos+22])))
+    return header_size,image_bytes
+def _scan_frame_offsets(path, offset=0, end=None):
+    """
+    Build the array of frame offsets for an .ecam file starting from `offset` (the last element is the end of the last frame).
+
+    Only the fixed part of headers (size, version and magic) is parsed directly from the memory-mapped file.
+    Frame headers are checked in batches (under the assumption that consecutive frames usually have the same size),
+    so most of the index is built with vectorized operations without reading the frames data.
+    `end` specifies the end of the frames data (by default, the file size).
+    The last incomplete frame (e.g., if it is still being written) is not included.
+    """
+    if end is None:
+        end=os.path.getsize(path)
+    if end-offset<_hf_offsets["version"]:
+        return np.array([offset],dtype="i8")
+    data=np.memmap(path,dtype="u1",mode="r",shape=(end,))
+    min_batch=16
+    offsets=[np.array([offset],dtype="i8")]
+    pos,batch=offset,min_batch
+    while end-pos>=_hf_offsets["version"]:
+        sizes=_check_frame_sizes(data,pos,end)
+        if sizes is None:
+            break
+        header_size,image_bytes=sizes
+        frame_size=header_size+image_bytes
+        nmax=min((end-pos)//frame_size,batch)
+        if nmax==0:
+            break
+        candidates=pos+frame_size*np.arange(nmax,dtype="i8")
+        headers=data[candidates[:,None]+np.arange(min(header_size,_hf_offsets["shape"]))]
+        matched=(headers==headers[0]).all(axis=1)
+        nmatched=nmax if matched.all() else int(np.argmin(matched))
+        pos+=frame_size*nmatched
+        offsets.append(candidates[:nmatched]+frame_size)
+        batch=batch*2 if nmatched==nmax else min_batch
+    del data
+    return np.concatenate(offsets)
+
+def _read_index_footer(f):
+    """
+    Read the frame offsets index stored in the footer of an opened .ecam file `f`.
+
+    Return offsets array (the last element is the end of the last frame, i.e., the start of the footer), or ``None`` if there is no valid index.
+    """
+    f.seek(0,2)
+    file_size=f.tell()
+    if file_size<16:
+        return None
+    f.seek(file_size-16)
+    tail=f.read(16)
+    if tail[8:]!=index_magic:
+        return None
+    n=int(np.frombuffer(tail[:8],"<u8")[0])
+    index_start=file_size-16-8*n
+    if n<1 or index_start<0:
+        return None
+    f.seek(index_start)
+    offsets=np.frombuffer(f.read(8*n),"<u8").astype("i8")
+    if offsets[0]!=0 or offsets[-1]!=index_start or np.any(np.diff(offsets)<=0):
+        return None
+    return offsets
+def _write_index_footer(f, offsets):
+    """Write the frame offsets index footer to the file `f` at the current position"""
+    f.write(np.asarray(offsets).astype("<u8").tobytes())
+    binio.write_num(len(offsets),f,"<u8")
+    f.write(index_magic)
+
+def _open_for_writing(path, append=True, index=False):
+    """
+    Open .ecam file for writing, removing the index footer if present and placing the position at the end of the frames data.
+
+    Return tuple ``(f, offsets)``, where `offsets` is the list of the existing frame offsets,
+    or ``None`` if it's not available (if the file has no index footer and ``index==False``, or if the last frame is incomplete).
+    """
+    mode="r+b" if (append and os.path.exists(path)) else "wb"
+    f=open(path,mode)
+    offsets=_read_index_footer(f) if mode=="r+b" else None
+    if offsets is not None:
+        f.seek(offsets[-1])
+        f.truncate()
+        offsets=offsets.tolist()
+    else:
+        f.seek(0,2)
+        if index:
+            offsets=_scan_frame_offsets(path).tolist() if f.tell() else [0]
+            if offsets[-1]!=f.tell(): # incomplete last frame
+                offsets=None
+    return f,offsets
+def save_ecam(frames, path, append=True, formatter=None, index=False):
     """
     Save `frames` into a .ecam datafile.
 
     If ``append==False``, clear the file before writing the frames.
     `formatter` specifies :class:`ECamFormatter` instance for frame saving.
+    If ``index==True``, append the frame offsets index footer to the file, which makes determining the number of frames
+    and random access in :class:`ECamReader` faster (an existing footer is updated when appending, or removed if ``index==False``).
     """
-    mode="r+b" if (append and os.path.exists(path)) else "wb"
     formatter=formatter or ECamFormatter()
-    with open(path,mode) as f:
-        f.seek(0,2)
+    f,offsets=_open_for_writing(path,append=append,index=index)
+    with f:
         for fr in frames:
             formatter.write_frame(fr,f)
+            if offsets is not None:
+                offsets.append(f.tell())
+        if index and offsets is not None:
+            _write_index_footer(f,offsets)
+
+TWriterStatus=collections.namedtuple("TWriterStatus",["queued","written","dropped","bytes_written","rate"])
+class ECamWriter(object):
+    """
+    Background writer for .ecam files.
+
+    Frames added using :meth:`add_frame` are placed into a bounded queue and written by a separate thread,
+    which combines several frames into a single large sequential write.
+    Since the frames are written asynchronously, their data should not be modified after they have been added.
+    Can be used as a context manager, which closes the writer on exit.
+    If an error occurs while formatting or writing the frames, no more frames (or index footer) are written,
+    and the error is raised by all the subsequent :meth:`add_frame` and :meth:`close` calls.
+
+    Args:
+        path(str): path to .ecam file.
+        append(bool): if ``False``, clear the file before writing the frames.
+        formatter(ECamFormatter): formatter for frame saving.
+        queue_size(int): maximal number of frames in the queue.
+        drop_frames(bool): if ``True``, frames added while the queue is full are dropped (their number is available in :meth:`get_status`);
+            otherwise, :meth:`add_frame` waits until the queue has free space.
+        batch_size(int): maximal size of a single write (in bytes).
+        format_threads(int): if non-zero, specifies the number of threads formatting the frames (including the compression for ``"zlib"`` storage type);
+            otherwise, the frames are formatted in the writing thread.
+        index(bool): if ``True``, append the frame offsets index footer on closing (see :func:`save_ecam`).
+    """
+    def __init__(self, path, append=True, formatter=None, queue_size=256, drop_frames=True, batch_size=2**24, format_threads=0, index=False):
+        object.__init__(self)
+        self.path=path
+        self.formatter=formatter or ECamFormatter()
+        self.drop_frames=drop_frames
+        self.batch_size=batch_size
+        self.index=index
+        self._file,self._offsets=_open_for_writing(path,append=append,index=index)
+        self._queue=Queue(queue_size)
+        self._pool=multiprocessing.pool.ThreadPool(format_threads) if format_threads else None
+        self._written=0
+        self._dropped=0
+        self._bytes_written=0
+        self._start_time=time.time()
+        self._stop_time=None
+        self._error=None
+        self._thread=threading.Thread(target=self._write_loop,name="ECamWriter")
+        self._thread.daemon=True
+        self._thread.start()
+
+    def _write_item(self, item, buff):
+        header,data=item.get() if self._pool is not None else self.formatter._format_frame(item)
+        self.formatter._write_header(header,buff)
+        self.formatter._write_image(header,data,buff)
+    def _write_loop(self):
+        finished=False
+        while not finished:
+            item=self._queue.get()
+            buff=io.BytesIO()
+            frame_ends=[]
+            while True:
+                if item is None:
+                    finished=True
+                    break
+                if self._error is None:
+                    try:
+                        self._write_item(item,buff)
+                        frame_ends.append(buff.tell())
+                    except Exception as e:
+                        self._error=e
+                if buff.tell()>=self.batch_size:
+                    break
+                try:
+                    item=self._queue.get_nowait()
+                except Empty:
+                    break
+            if frame_ends and self._error is None:
+                try:
+                    pos=self._file.tell()
+                    self._file.write(buff.getvalue())
+                    self._file.flush()
+                    if self._offsets is not None:
+                        self._offsets.extend([pos+e for e in frame_ends])
+                    self._written+=len(frame_ends)
+                    self._bytes_written+=frame_ends[-1]
+                except Exception as e:
+                    self._error=e
+        self._stop_time=time.time()
+    def _check_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def add_frame(self, frame):
+        """
+        Add a frame to the writing queue.
+
+        `frame` can be either :class:`ECamFrame` object, or a numpy array (in which case no metadata is saved).
+        Return ``True`` if the frame has been added, or ``False`` if it has been dropped.
+        If an error has occurred while writing the previous frames, raise it.
+        """
+        self._check_error()
+        if self._thread is None:
+            raise IOError("writer is closed")
+        if self.drop_frames and self._queue.full():
+            self._dropped+=1
+            return False
+        item=self._pool.apply_async(self.formatter._format_frame,(frame,)) if self._pool is not None else frame
+        self._queue.put(item)
+        return True
+    def get_status(self):
+        """
+        Get the writer status.
+
+        Return tuple ``(queued, written, dropped, bytes_written, rate)`` with the current queue length, the number of written and dropped frames,
+        the total number of written bytes, and the average writing rate (in MB/s).
+        """
+        elapsed=(self._stop_time or time.time())-self._start_time
+        rate=self._bytes_written/elapsed/1E6 if elapsed>0 else 0.
+        return TWriterStatus(self._queue.qsize(),self._written,self._dropped,self._bytes_written,rate)
+    def close(self):
+        """
+        Write all the queued frames and close the file.
+
+        If an error has occurred while writing the frames, raise it.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread=None
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+            try:
+                if self.index and self._offsets is not None and self._error is None:
+                    _write_index_footer(self._file,self._offsets)
+            finally:
+                self._file.close()
+        self._check_error()
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
 
 def save_ecam_single(frame, path, append=True, **kwargs):
     """
@@ -400,6 +657,7 @@ class ECamReader(object):
 
     Allows transparent access to frames by reading them from the file on the fly (without loading the whole file).
     Supports determining length, indexing (only positive single-element indices) and iteration.
+    If the file contains the frame offsets index footer (see :func:`save_ecam`), it is used instead of scanning the frame headers.
 
     Args:
         path(str): path to .ecam file.
@@ -415,63 +673,69 @@ class ECamReader(object):
         self.frame_offsets=[0]
         self.frames_num=None
         self.same_size=same_size
+        self._data_size=None
         self.return_format=return_format
         self.formatter=formatter or ECamFormatter()
 
-    def _read_frame_at(self, offset):
+    def _read_frame_at(self, offset, return_format=None):
         with open(self.path,"rb") as f:
             f.seek(offset)
-            return self.formatter.read_frame(f,return_format=self.return_format)
-    def _read_next_frame(self, f, skip=False):
+            return self.formatter.read_frame(f,return_format=return_format or self.return_format)
+    def _read_next_frame(self, f, skip=False, return_format=None):
         if skip:
             self.formatter.skip_frame(f)
             data=None
         else:
-            data=self.formatter.read_frame(f,return_format=self.return_format)
+            data=self.formatter.read_frame(f,return_format=return_format or self.return_format)
         self.frame_offsets.append(f.tell())
         return data
-    def _read_frame(self, idx):
+    def _get_index(self):
+        with open(self.path,"rb") as f:
+            return _read_index_footer(f)
+    def _get_data_size(self):
+        index=self._get_index()
+        self._data_size=os.path.getsize(self.path) if index is None else index[-1]
+        return self._data_size
+    def _read_frame(self, idx, return_format=None):
         idx=int(idx)
         if self.same_size:
             if len(self.frame_offsets)==1:
                 with open(self.path,"rb") as f:
                     self._read_next_frame(f,skip=True)
             offset=self.frame_offsets[1]*idx
-            return self._read_frame_at(offset)
+            if self._data_size is None or offset>=self._data_size: # only re-read the size if the offset is beyond the known data
+                if offset>=self._get_data_size():
+                    raise StopIteration
+            return self._read_frame_at(offset,return_format=return_format)
         else:
-            if idx<len(self.frame_offsets):
-                return self._read_frame_at(self.frame_offsets[idx])
-            next_idx=len(self.frame_offsets)-1
-            offset=self.frame_offsets[-1]
-            with open(self.path,"rb") as f:
-                f.seek(offset)
-                while next_idx<=idx:
-                    data=self._read_next_frame(f,next_idx<idx)
-                    next_idx+=1
-            return data
-
+            if idx>=len(self.frame_offsets)-1:
+                self._extend_offsets()
+                if idx>=len(self.frame_offsets)-1:
+                    raise StopIteration
+            return self._read_frame_at(self.frame_offsets[idx],return_format=return_format)
+
+    def _extend_offsets(self):
+        index=self._get_index()
+        if index is not None and index[-1]>=self.frame_offsets[-1]:
+            self.frame_offsets=index.tolist()
+        else:
+            offsets=_scan_frame_offsets(self.path,self.frame_offsets[-1])
+            self.frame_offsets=self.frame_offsets[:-1]+offsets.tolist()
     def _fill_offsets(self):
         if self.frames_num is not None:
             return
         if self.same_size:
-            file_size=os.path.getsize(self.path)
-            if file_size==0:
+            data_size=self._get_data_size()
+            if data_size==0:
                 self.frames_num=0
             else:
                 with open(self.path,"rb") as f:
                     self._read_next_frame(f,skip=True)
-                if file_size%self.frame_offsets[1]:
-                    raise IOError("File size {} is not a multiple of single frame size {}".format(file_size,self.frame_offsets[1]))
-                self.frames_num=file_size//self.frame_offsets[1]
+                if data_size%self.frame_offsets[1]:
+                    raise IOError("File size {} is not a multiple of single frame size {}".format(data_size,self.frame_offsets[1]))
+                self.frames_num=data_size//self.frame_offsets[1]
         else:
-            offset=self.frame_offsets[-1]
-            try:
-                with open(self.path,"rb") as f:
-                    f.seek(offset)
-                    while True:
-                        self._read_next_frame(f,skip=True)
-            except StopIteration:
-                pass
+            self._extend_offsets()
             self.frames_num=len(self.frame_offsets)-1
     
     def size(self):
@@ -505,17 +769,30 @@ class ECamReader(object):
             start,stop=args
         elif len(args)==3:
             start,stop,step=args
+        return self._iterrange(start,stop,step)
+    def _iterrange(self, start=0, stop=None, step=1, return_format=None):
         if step<0:
             raise IndexError("format doesn't support reversed indexing")
         try:
             n=start
             while True:
-                yield self._read_frame(n)
+                yield self._read_frame(n,return_format=return_format)
                 n+=step
                 if stop is not None and n>=stop:
                     break
         except StopIteration:
             pass
+    def read_range(self, start=0, stop=None, step=1):
+        """
+        Read frame images starting with `start` ending at `stop` (``None`` means until the end of file) with the given `step`.
+
+        Return a single numpy array with the first axis enumerating frames (independent of `return_format`);
+        all the frames in the range should have the same shape and dtype.
+        """
+        images=list(self._iterrange(start,stop,step,return_format="image"))
+        if any(img is None or img.shape!=images[0].shape or img.dtype!=images[0].dtype for img in images):
+            raise ECamFormatError("frame images in the range are missing or have different shapes or types")
+        return np.array(images)
     def read_all(self):
         """Read all available frames"""
         return list(self.iterrange())
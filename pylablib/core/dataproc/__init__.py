@@ -6,11 +6,14 @@ from .waveforms import find_discrete_step, unwrap_mod_data
 from .waveforms import xy2c, c2xy
 
 from . import fourier
-from .fourier import fourier_transform, inverse_fourier_transform, power_spectral_density
+from .fourier import fourier_transform, inverse_fourier_transform, power_spectral_density, welch_power_spectral_density, PSDAccumulator
+
+from . import jit
 
 from . import filters
 from .filters import convolution_filter, gaussian_filter, gaussian_filter_nd, low_pass_filter, high_pass_filter, sliding_average, median_filter
-from .filters import decimate, binning_average, decimate_datasets, decimate_full, collect_into_bins, split_into_bins
+from .filters import decimate, binning_average, decimate_datasets, decimate_full, collect_into_bins, split_into_bins, collect_into_bins_indices, split_into_bins_indices
+from .filters import IIRStreamFilter, LowPassStreamFilter, GaussianStreamFilter, SlidingStreamFilter, DecimationStreamFilter
 
 from . import fitting
 from .fitting import Fitter, get_best_fit
@@ -25,4 +28,4 @@ from . import specfunc
 from .specfunc import get_kernel_func, get_window_func
 
 from . import feature as feature_detect
-from .feature import get_baseline_simple, subtract_baseline, find_peaks_cutoff, multi_scale_peakdet, rescale_peak, peaks_sum_func, find_local_extrema, find_state_hysteretic, trigger_hysteretic
\ No newline at end of file
+from .feature import get_baseline_simple, subtract_baseline, find_peaks_cutoff, multi_scale_peakdet, rescale_peak, peaks_sum_func, find_local_extrema, find_state_hysteretic, trigger_hysteretic, HystereticTrigger
\ No newline at end of file
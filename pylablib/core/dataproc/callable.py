@@ -20,6 +20,8 @@ class ICallable(object):
     if the function is to be called many times with the same parameter names list,
     one can first bind parameters list, and then call bound function with the corresponding arguments.
     This way, ``callable(**p)`` should be equivalent to ``callable.bind(p.keys())(*p.values())``.
+    
+    Can also (depending on subclasses) supply analytic derivatives with respect to its arguments, which are used to speed up fitting.
     """
     def __init__(self):
         object.__init__(self)
@@ -81,6 +83,34 @@ class ICallable(object):
         return bound_call
         #sig=FunctionSignature(arg_names=arg_names,kwarg_name="kwargs")
         #return sig.wrap_function(bound_call)
+
+    def has_jacobian(self, wrt):
+        """Check if the function can calculate analytic derivatives with respect to all of the arguments in the list `wrt`."""
+        return False
+    def jacobian(self, wrt, **params):
+        """
+        Calculate analytic derivatives of the function with respect to the arguments in the list `wrt`.
+        
+        Return list of derivatives in the same order as `wrt` (each derivative can be a scalar, if it doesn't depend on the x arguments).
+        """
+        raise NotImplementedError("ICallable.jacobian")
+    class NamesBoundJacobian(object):
+        def __init__(self, func, names, wrt, bound_params):
+            object.__init__(self)
+            self._func=func
+            self._names=names
+            self._wrt=wrt
+            self._bound_params=bound_params
+        def __call__(self, *params):
+            self._bound_params.update(zip(self._names,params))
+            return self._func.jacobian(self._wrt,**self._bound_params)
+    def bind_jacobian_namelist(self, arg_names, wrt, **bound_params):
+        """
+        Bind namelist for the Jacobian calculation with respect to the arguments `wrt`.
+        
+        Same as :meth:`bind_namelist`, but the bound function calls :meth:`jacobian` instead of the function itself.
+        """
+        return self.NamesBoundJacobian(self,arg_names,wrt,bound_params)
     
     
 
@@ -243,13 +273,17 @@ class FunctionCallable(ICallable):
         alias (dict): A dictionary ``{alias: original}`` for renaming some of the original arguments.
             Original argument names can't be used if aliased (though, multi-aliasing can be used explicitly, e.g., ``alias={'alias':'arg','arg':'arg'}``).
             A name can be blocked (its usage causes error) if it's aliased to None (``alias={'blocked_name':None}``).
+        jacobian: A function with the same arguments as `func`, which returns a dictionary ``{name: derivative}`` of the analytic derivatives of `func`
+            with respect to its (original, non-aliased) arguments. Used to speed up fitting.
+        jacobian_args (list): List of the (original, non-aliased) argument names, for which `jacobian` supplies derivatives.
+            By default, these are all the arguments with default values.
     
     Optional non-named arguments in the form ``*args`` are not supported, since all the arguments are passed to the function by keywords.
     
     Optional named arguments in the form ``**kwargs`` are supported only if their default values are explicitly provided in defaults
     (otherwise it would be unclear whether argument should be added into ``**kwargs`` or ignored altogether).
     """
-    def __init__(self, func, function_signature=None, defaults=None, alias=None):
+    def __init__(self, func, function_signature=None, defaults=None, alias=None, jacobian=None, jacobian_args=None):
         ICallable.__init__(self)
         self._func=func
         self._set_alias(alias)
@@ -262,6 +296,10 @@ class FunctionCallable(ICallable):
         self._mand_args=set([a for a in function_signature.arg_names if not a in self._defaults])
         self._mand_args_alias=set(self._apply_alias(self._mand_args))
         self._use_keywords=function_signature.kwarg_name is not None
+        self._jacobian=jacobian
+        if jacobian is not None and jacobian_args is None:
+            jacobian_args=[a for a in function_signature.arg_names if a in self._defaults]
+        self._jacobian_args=set(jacobian_args or [])
     def _set_alias(self, alias):
         self._alias=alias
         self._masked=set()
@@ -324,6 +362,22 @@ class FunctionCallable(ICallable):
         named_params.update(self._apply_unalias_dict(params))
         named_params=self.filter_args_dict(named_params)
         return self._func(**named_params)
+    def has_jacobian(self, wrt):
+        if self._jacobian is None:
+            return False
+        try:
+            return all(self._apply_unalias(n) in self._jacobian_args for n in wrt)
+        except KeyError:
+            return False
+    def jacobian(self, wrt, **params):
+        for n in self._mand_args:
+            if not n in params:
+                raise TypeError("mandatory parameter not supplied: {0}".format(n))
+        named_params=self._defaults.copy()
+        named_params.update(self._apply_unalias_dict(params))
+        named_params=self.filter_args_dict(named_params)
+        jac=self._jacobian(**named_params)
+        return [jac[self._apply_unalias(n)] for n in wrt]
     
     class NamesBoundCall(object):
         def __init__(self, func, names, bound_params):
@@ -348,6 +402,14 @@ class FunctionCallable(ICallable):
                 if d[0]=='named':
                     n_par[d[1]]=p
             return self._func(**n_par)
+    class NamesBoundJacobian(NamesBoundCall):
+        def __init__(self, func, names, wrt, bound_params):
+            FunctionCallable.NamesBoundCall.__init__(self,func,names,bound_params)
+            self._func=func._jacobian
+            self._wrt=[func._apply_unalias(n) for n in wrt]
+        def __call__(self, *params):
+            jac=FunctionCallable.NamesBoundCall.__call__(self,*params)
+            return [jac[n] for n in self._wrt]
                     
 
 
@@ -461,11 +523,12 @@ def to_callable(func):
     
     If it's already :class:`ICallable`, return unchanged.
     Otherwise, return :class:`FunctionCallable` or :class:`MethodCallable` depending on whether it's a function or a bound method.
+    If the function has ``jacobian`` attribute (e.g., the kernels in :mod:`.specfunc`), it is used as the analytic Jacobian (see :class:`FunctionCallable`).
     """
     if isinstance(func, ICallable):
         return func
     else:
         if getattr(func,"__self__",None) is None:
-            return FunctionCallable(func)
+            return FunctionCallable(func,jacobian=getattr(func,"jacobian",None))
         else:
             return MethodCallable(func)
\ No newline at end of file
@@ -2,10 +2,8 @@
 Traces feature detection: peaks, baseline, local extrema.
 """
 
-from builtins import range
-
 from ..utils import funcargparse
-from . import waveforms, specfunc, filters
+from . import specfunc, filters
 
 import numpy as np
 import collections
@@ -175,45 +173,49 @@ def multi_scale_peakdet(trace, widths, background_ratio, kind="peak", kernel="lo
 
 def find_local_extrema(wf, region_width=3, kind="max", min_distance=None):
     """
-    Find local extrema (minima or maxima) of 1D waveform.
+    Find local extrema (minima or maxima) of 1D waveform or an N-D array (e.g., to find spots in camera frames).
     
     `kind` can be ``"min"`` or ``"max"`` and determines the kind of the extrema. 
-    Local minima (maxima) are defined as points which are smaller (greater) than all other points in the region of width `region_width` around it.
+    Local minima (maxima) are defined as points which are smaller (greater) than all other points in the region of width `region_width` around it
+    (for N-D arrays the region is a hypercube with the side `region_width`).
     `region_width` is always round up to an odd integer.
     `min_distance` defines the minimal distance between the exterma (``region_width//2`` by default).
-    If there are several exterma within `min_distance`, their positions are averaged together.
+    If there are several exterma within `min_distance`, their positions are averaged together
+    (for N-D arrays, the distance is the maximal distance along all axes, and the extrema closer than `min_distance` are grouped together transitively).
+    
+    For 1D waveforms, return an array of extrema indices; for N-D arrays, return an ``(n,ndim)`` array of extrema index tuples.
     """
-    if np.ndim(wf)!=1:
-        raise ValueError("function only works with 1D arrays")
+    import scipy.ndimage as ndimage
+    wf=np.asarray(wf)
+    if wf.ndim==0:
+        raise ValueError("function only works with 1D and N-D arrays")
     dist=int(region_width//2)
     if min_distance is None:
         min_distance=dist
-    l=len(wf)
     if kind=="max":
-        extf=np.max
+        extf=ndimage.maximum_filter1d if wf.ndim==1 else ndimage.maximum_filter
     elif kind=="min":
-        extf=np.min
+        extf=ndimage.minimum_filter1d if wf.ndim==1 else ndimage.minimum_filter
     else:
         raise ValueError("unrecognized extremum kind: {}".format(kind))
-    if region_width<len(wf)*10 and len(wf)*region_width<=1E7: # faster workaround
-        ewf=waveforms.expand_waveform(wf,size=dist,mode="nearest")
-        regions=np.column_stack([ewf[i:l+i] for i in range(dist*2+1)])
-        ext_values=extf(regions,axis=1)
-        ext_idx=np.nonzero(wf==ext_values)[0]
-    else:
-        ext_idx=[i for i in range(len(wf)) if wf[i]==extf(wf[max(i-dist,0):min(l,i+dist+1)])]
+    if wf.size==0:
+        return np.zeros((0,wf.ndim) if wf.ndim>1 else 0,dtype=int)
+    ext_mask=(wf==extf(wf,dist*2+1,mode="nearest"))
+    if wf.ndim==1:
+        ext_idx=np.flatnonzero(ext_mask)
+        if min_distance<=1 or len(ext_idx)==0:
+            return ext_idx
+        start=np.concatenate(([0],np.flatnonzero(np.diff(ext_idx)>=min_distance)+1))
+        return np.add.reduceat(ext_idx,start)//np.diff(np.append(start,len(ext_idx)))
+    ext_idx=np.nonzero(ext_mask)
     if min_distance<=1:
-        return ext_idx
-    filtered_idx=[]
-    acc_idx=[]
-    for mi in ext_idx:
-        if acc_idx and mi-acc_idx[-1]>=min_distance:
-            filtered_idx.append(int(np.mean(acc_idx)))
-            acc_idx=[]
-        acc_idx.append(mi)
-    if acc_idx:
-        filtered_idx.append(int(np.mean(acc_idx)))
-    return filtered_idx
+        return np.column_stack(ext_idx)
+    # extrema closer than `min_distance` along all axes get overlapping (or touching) regions after the dilation
+    grouping_mask=ndimage.maximum_filter(ext_mask,int(np.ceil(min_distance))-1,mode="constant",cval=False)
+    labels,nlabels=ndimage.label(grouping_mask,structure=np.ones((3,)*wf.ndim))
+    ext_labels=labels[ext_idx]-1
+    counts=np.bincount(ext_labels,minlength=nlabels)
+    return np.column_stack([np.bincount(ext_labels,weights=idx,minlength=nlabels).astype(int)//counts for idx in ext_idx])
 
 
 
@@ -238,15 +240,10 @@ def find_state_hysteretic(wf, threshold_off, threshold_on, normalize=True):
     states=1*(wf>threshold_on)+(-1)*(wf<threshold_off)
     if not states.any():
         return states
-    unspec=(states==0).nonzero()[0]
-    for u in unspec:
-        if u>0:
-            states[u]=states[u-1]
-    unspec=(states==0).nonzero()[0] # in case the points in the beginning were undefined
-    for u in unspec[::-1]:
-        if u<len(states)-1:
-            states[u]=states[u+1]
-    return states
+    defined=states!=0
+    src=np.maximum.accumulate(np.where(defined,np.arange(len(states)),-1)) # index of the last defined state (forward fill)
+    src[src<0]=defined.argmax() # in case the points in the beginning were undefined
+    return states[src]
 
 def trigger_hysteretic(wf, threshold_on, threshold_off, init_state="undef", result_kind="separate"):
     """
@@ -260,33 +257,93 @@ def trigger_hysteretic(wf, threshold_on, threshold_off, init_state="undef", resu
     """
     if threshold_off>threshold_on:
         raise ValueError("off threshold level should be below on threshold level")
-    trace_pos=wf>threshold_on
+    state=_hysteretic_init_states.get(init_state)
+    if state is None:
+        raise ValueError("unrecognized initial state: {}".format(init_state))
+    funcargparse.check_parameter_range(result_kind,"result_kind",{"separate","joined"})
+    wf=np.asarray(wf)
+    trig,dirs,_=_find_hysteretic_triggers(wf>threshold_on,wf<threshold_off,state)
+    return _format_hysteretic_triggers(trig,dirs,result_kind)
+
+
+_hysteretic_init_states={"undef":0,"low":-1,"high":1}
+def _find_hysteretic_triggers(trace_pos, trace_neg, state):
+    """
+    Find hysteretic trigger events given boolean arrays of the values above the on threshold (`trace_pos`) and below the off threshold (`trace_neg`).
+
+    Return tuple ``(trig, dirs, state)`` with trigger indices, trigger directions, and the final state.
+    """
     trace_rise=trace_pos[1:]&(~trace_pos[:-1])
-    trace_neg=wf<threshold_off
     trace_fall=trace_neg[1:]&(~trace_neg[:-1])
-    if init_state=="undef":
-        state=0
-    elif init_state=="low":
-        state=-1
-    elif init_state=="high":
-        state=1
-    else:
-        raise ValueError("unrecognized initial state: {}".format(init_state))
-    trace_trig=trace_rise.astype(int)-trace_fall.astype(int)
-    rise_trig=[]
-    fall_trig=[]
-    for i in trace_trig.nonzero()[0]:
-        if state!=trace_trig[i]:
-            state=trace_trig[i]
-            if state>0:
-                rise_trig.append(i)
-            else:
-                fall_trig.append(i)
+    trig=np.flatnonzero(trace_rise|trace_fall)
+    dirs=np.where(trace_rise[trig],1,-1)
+    if len(dirs)==0:
+        return trig,dirs,state
+    prev_dirs=np.empty_like(dirs) # after each candidate event, the state is equal to its direction, so only the changes of direction are triggers
+    prev_dirs[0]=state
+    prev_dirs[1:]=dirs[:-1]
+    switch=dirs!=prev_dirs
+    return trig[switch],dirs[switch],dirs[-1]
+def _format_hysteretic_triggers(trig, dirs, result_kind):
     if result_kind=="separate":
-        return rise_trig,fall_trig
-    elif result_kind=="joined":
-        res=[(1,i) for i in rise_trig]+[(-1,i) for i in fall_trig]
-        res.sort(lambda x: x[1])
-        return res
+        return trig[dirs>0],trig[dirs<0]
     else:
-        raise ValueError("unrecognized result kind: {}".format(result_kind))
\ No newline at end of file
+        return list(zip(dirs.tolist(),trig.tolist()))
+
+class HystereticTrigger(object):
+    """
+    Streaming version of :func:`trigger_hysteretic`.
+
+    The trace is supplied in consecutive chunks using :meth:`process`; the trigger state is carried over between the chunks,
+    so the combined result is the same as for :func:`trigger_hysteretic` applied to the whole trace.
+
+    Args:
+        threshold_on: level of the 'low' to 'high' state switch.
+        threshold_off: level of the 'high' to 'low' state switch.
+        init_state: initial state: ``"low"``, ``"high"``, or ``"undef"`` (undefined state).
+        result_kind: result kind; either ``"separate"`` (two arrays ``(rise_trig, fall_trig)``), or ``"joined"`` (single list of tuples ``[(dir,pos)]``).
+    """
+    def __init__(self, threshold_on, threshold_off, init_state="undef", result_kind="separate"):
+        if threshold_off>threshold_on:
+            raise ValueError("off threshold level should be below on threshold level")
+        if init_state not in _hysteretic_init_states:
+            raise ValueError("unrecognized initial state: {}".format(init_state))
+        funcargparse.check_parameter_range(result_kind,"result_kind",{"separate","joined"})
+        self.threshold_on=threshold_on
+        self.threshold_off=threshold_off
+        self.init_state=init_state
+        self.result_kind=result_kind
+        self.reset()
+
+    def reset(self):
+        """Reset the trigger state"""
+        self.state=_hysteretic_init_states[self.init_state]
+        self.position=0
+        self._last=None
+
+    def get_state(self):
+        """Get the current state (``+1`` for 'high', ``-1`` for 'low', or ``0`` if undefined)"""
+        return self.state
+
+    def process(self, wf):
+        """
+        Process the next chunk of the trace.
+
+        Return triggers found in this chunk (in the format specified by `result_kind`), with indices counted from the beginning of the whole trace.
+        """
+        wf=np.asarray(wf)
+        if len(wf)==0:
+            return _format_hysteretic_triggers(np.zeros(0,dtype=int),np.zeros(0,dtype=int),self.result_kind)
+        trace_pos=wf>self.threshold_on
+        trace_neg=wf<self.threshold_off
+        if self._last is None:
+            shift=0
+        else:
+            trace_pos=np.concatenate(([self._last[0]],trace_pos))
+            trace_neg=np.concatenate(([self._last[1]],trace_neg))
+            shift=-1
+        trig,dirs,self.state=_find_hysteretic_triggers(trace_pos,trace_neg,self.state)
+        trig+=self.position+shift
+        self.position+=len(wf)
+        self._last=(trace_pos[-1],trace_neg[-1])
+        return _format_hysteretic_triggers(trig,dirs,self.result_kind)
@@ -10,10 +10,10 @@ from ..datatable import column #@UnresolvedImport
 from ..datatable import table #@UnresolvedImport
 from ..datatable.wrapping import wrap #@UnresolvedImport
 from ..utils import funcargparse, general as general_utils #@UnresolvedImport
-from . import waveforms, specfunc, iir_transform
+from . import waveforms, specfunc, iir_transform, jit
 
 import numpy as np
-import scipy.ndimage as ndimage
+import bisect
 
 _depends_local=["..datatable.column","..datatable.table",".waveforms"]
 
@@ -28,6 +28,7 @@ def convolve1d(wf, kernel, mode="reflect", cval=0.):
     Convolves `wf` with the given `kernel` (1D array). `mode` and `cval` determine how the endpoints are handled.
     Simply a wrapper around the standard :func:`scipy.ndimage.convolve` that handles complex arguments.
     """
+    import scipy.ndimage as ndimage
     wf=np.asarray(wf)
     kernel=np.asarray(kernel)
     wf_complex=np.iscomplexobj(wf) or np.iscomplexobj(cval)
@@ -93,6 +94,7 @@ def gaussian_filter_nd(wf, width=1., mode="reflect", cval=0.):
     
     Equivalent to a convolution with a gaussian. Wrapper around :func:`scipy.ndimage.gaussian_filter`. 
     """
+    import scipy.ndimage as ndimage
     res=ndimage.gaussian_filter(wf*1., width, mode=mode, cval=cval)
     return wrap(wf).array_replaced(res,wrapped=False)
 
@@ -161,6 +163,7 @@ def median_filter(wf, width=1, mode="reflect", cval=0.):
     
     Wrapper around :func:`scipy.ndimage.median_filter`.
     """
+    import scipy.ndimage as ndimage
     res=ndimage.median_filter(wf,width,mode=mode,cval=cval)
     return wrap(wf).array_replaced(res,wrapped=False)
 
@@ -179,6 +182,115 @@ def _sliding_func(wf, filtering_function, width=1, mode="reflect", cval=0.):
     wf=waveforms.expand_waveform(wf,width//2,mode,cval)
     return np.array([filtering_function(wf[i-width//2:i+width//2+1]) for i in range(width//2,l+width//2)])
 
+def _sliding_windows_reduce(wf, width, func, offset=0):
+    """
+    Reduce all `width`-long windows of a 1D array `wf` using van Herk/Gil-Werman algorithm.
+
+    `func` is the element-wise reduction ufunc (:func:`numpy.add`, :func:`numpy.minimum` or :func:`numpy.maximum`).
+    The array is split into `width`-long blocks, and each window is reduced by combining a block suffix and the following block prefix.
+    Block boundaries are placed at positions ``i`` with ``(i+offset)%width==0``, so the results only depend on the window values and the `offset`
+    (important for sums, which are affected by rounding errors).
+    """
+    l=len(wf)
+    pad_left=offset%width
+    nblocks=-(-(l+pad_left)//width)
+    pad_right=nblocks*width-l-pad_left
+    blocks=np.concatenate((np.repeat(wf[:1],pad_left),wf,np.repeat(wf[-1:],pad_right))).reshape((nblocks,width))
+    dtype=None
+    if func is np.add:
+        dtype={"b":"i8","i":"i8","u":"u8","f":"f8","c":"c16"}.get(wf.dtype.kind)
+    prefix=func.accumulate(blocks,axis=1,dtype=dtype).ravel()[pad_left:]
+    suffix=func.accumulate(blocks[:,::-1],axis=1,dtype=dtype)[:,::-1].ravel()[pad_left:]
+    nres=l-width+1
+    res=func(suffix[:nres],prefix[width-1:width-1+nres])
+    aligned=(-offset)%width # windows coinciding with blocks are equal to the block suffix
+    res[aligned::width]=suffix[aligned:nres:width]
+    return res
+def _sliding_windows_median_py(wf, width):
+    keys=np.where(np.isnan(wf),np.inf,wf)
+    has_nan=_sliding_windows_reduce(np.isnan(wf),width,np.maximum)
+    window=sorted(keys[:width].tolist())
+    mid=width//2
+    res=[window[mid]]
+    keys=keys.tolist()
+    for i in range(1,len(wf)-width+1):
+        del window[bisect.bisect_left(window,keys[i-1])]
+        bisect.insort(window,keys[i+width-1])
+        res.append(window[mid])
+    res=np.array(res)
+    res[has_nan]=np.nan
+    return res
+@jit.kernel(fallback=_sliding_windows_median_py,warmup_args=lambda: [(np.zeros(4),3)],fastmath=False,parallel=False)
+def _sliding_windows_median(wf, width):
+    """
+    Calculate medians of all `width`-long (`width` is odd) windows of a 1D float array `wf`.
+
+    Keep the sorted window, which is updated by moving the incoming value into place of the outgoing one.
+    """
+    nres=len(wf)-width+1
+    res=np.empty(nres,dtype=wf.dtype)
+    window=np.empty(width,dtype=wf.dtype)
+    nnan=0
+    for i in range(width):
+        if np.isnan(wf[i]):
+            window[i]=np.inf
+            nnan+=1
+        else:
+            window[i]=wf[i]
+    window.sort()
+    mid=width//2
+    res[0]=np.nan if nnan else window[mid]
+    for i in range(1,nres):
+        old,new=wf[i-1],wf[i+width-1]
+        if np.isnan(old):
+            old=np.inf
+            nnan-=1
+        if np.isnan(new):
+            new=np.inf
+            nnan+=1
+        p=np.searchsorted(window,old)
+        if new>old:
+            while p+1<width and window[p+1]<new:
+                window[p]=window[p+1]
+                p+=1
+        else:
+            while p>0 and window[p-1]>new:
+                window[p]=window[p-1]
+                p-=1
+        window[p]=new
+        res[i]=np.nan if nnan else window[mid]
+    return res
+_sliding_functions={"bin":np.mean,"mean":np.mean,"sum":np.sum,"min":np.min,"max":np.max,"median":np.median}
+def _sliding_reduce(wf, dec_mode, width=1, mode="reflect", cval=0., offset=0):
+    """
+    Perform a sliding filtering of a 1D waveform with one of the standard reduction functions.
+    
+    Equivalent to :func:`_sliding_func` with the corresponding numpy function (up to floating point rounding errors for ``"sum"`` and ``"mean"``),
+    but takes O(n) time independent of the window width: uses van Herk/Gil-Werman algorithm for ``"sum"``, ``"mean"``, ``"min"`` and ``"max"``,
+    and a sorted sliding window for ``"median"``.
+    `offset` is the position of `wf` within a larger waveform (used to get exactly the same results when filtering the waveform in parts).
+    Works only with arrays (no columns or tables).
+    """
+    if width is None or width<=1:
+        return wf
+    width=(int(width)//2)*2+1
+    kinds="biuf" if dec_mode=="median" else "biufc"
+    if width//2>len(wf) or wf.dtype.kind not in kinds: # expanded waveform is truncated, or unsupported type
+        return _sliding_func(wf,_sliding_functions[dec_mode],width,mode=mode,cval=cval)
+    wf=np.asarray(waveforms.expand_waveform(wf,width//2,mode,cval))
+    dtype=np.asarray(_sliding_functions[dec_mode](wf[:width])).dtype
+    if dec_mode in {"bin","mean","sum"}:
+        res=_sliding_windows_reduce(wf,width,np.add,offset=offset)
+        if dec_mode!="sum":
+            res=res/width
+    elif dec_mode=="min":
+        res=_sliding_windows_reduce(wf,width,np.minimum,offset=offset)
+    elif dec_mode=="max":
+        res=_sliding_windows_reduce(wf,width,np.maximum,offset=offset)
+    else:
+        res=_sliding_windows_median(wf.astype("f8"),width)
+    return res.astype(dtype)
+
 def _sliding_filter(wf, n=1, dec_mode="bin", mode="reflect", cval=0.):
     """
     Perform sliding filtering on the data.
@@ -198,18 +310,9 @@ def _sliding_filter(wf, n=1, dec_mode="bin", mode="reflect", cval=0.):
         cval (float): If ``mode=='constant'``, determines the expanded values.
     """
     wf=np.asarray(wf)
-    if dec_mode=="bin" or dec_mode=="mean":
-        res=_sliding_func(wf,np.mean,n,mode=mode,cval=cval)
-    elif dec_mode=="sum":
-        res=_sliding_func(wf,np.sum,n,mode=mode,cval=cval)
-    elif dec_mode=="min":
-        res=_sliding_func(wf,np.min,n,mode=mode,cval=cval)
-    elif dec_mode=="max":
-        res=_sliding_func(wf,np.max,n,mode=mode,cval=cval)
-    elif dec_mode=="median":
-        res=_sliding_func(wf,np.median,n,mode=mode,cval=cval)
-    else:
+    if dec_mode not in _sliding_functions:
         raise ValueError("unrecognized decimation type: {0}".format(dec_mode))
+    res=_sliding_reduce(wf,dec_mode,n,mode=mode,cval=cval)
     return wrap(wf).array_replaced(res,wrapped=False)
 sliding_filter=general_utils.try_method_wrapper(_sliding_filter,method_name="sliding_filter")
 column.IDataColumn.sliding_filter=_sliding_filter
@@ -244,7 +347,7 @@ def _decimation_filter(wf, decimation_function, width=1, axis=0, mode="drop"):
             return dec_wf
         rest_indices=np.arange(dec_len,actual_len)
         dec_rest=decimation_function(np.take(wf,rest_indices,axis=axis),axis=axis)
-        return np.append(dec_wf,dec_rest,axis=axis)
+        return np.append(dec_wf,np.expand_dims(dec_rest,axis),axis=axis)
         
 
 def _decimate(wf, n=1, dec_mode="skip", axis=0, mode="drop"):
@@ -395,9 +498,246 @@ def decimate_datasets(wfs, dec_mode="mean"):
             decimated.append(decimated_column[:,0])
         return wrapped.columns_replaced(decimated,wrapped=False)
 
+
+
+
+##### Streaming filters #####
+
+class IStreamFilter(object):
+    """
+    Generic streaming filter.
+
+    Filters the trace supplied in consecutive chunks (e.g., during the data acquisition), keeping the required state between the chunks,
+    so that the combined output is identical to the result of filtering the whole trace.
+    The filtered data is returned once it's fully determined, so the output can be delayed relative to the input.
+    Works with numpy arrays (no columns or tables).
+    """
+    def __init__(self):
+        object.__init__(self)
+        self.reset()
+    def reset(self):
+        """Reset the filter state"""
+        raise NotImplementedError("IStreamFilter.reset")
+    def process(self, chunk):
+        """Process the next `chunk` of the trace and return the newly available part of the filtered trace"""
+        raise NotImplementedError("IStreamFilter.process")
+    def flush(self):
+        """Finish the trace, return the rest of the filtered trace, and reset the filter"""
+        raise NotImplementedError("IStreamFilter.flush")
+    def filter(self, wf):
+        """Filter the whole trace `wf` (equivalent to calling :meth:`process` followed by :meth:`flush`)"""
+        res=[self.process(wf),self.flush()]
+        return np.concatenate([r for r in res if len(r)] or res)
+
+class IIRStreamFilter(IStreamFilter):
+    """
+    Streaming digital recursive filter with coefficients `xcoeff` and `ycoeff`.
+
+    Equivalent to :func:`.iir_transform.iir_apply_complex` applied to the whole trace.
+    """
+    def __init__(self, xcoeff, ycoeff):
+        self.xcoeff=np.asarray(xcoeff)
+        self.ycoeff=np.asarray(ycoeff)
+        self.history=max(len(self.xcoeff)-1,len(self.ycoeff))
+        IStreamFilter.__init__(self)
+    def reset(self):
+        self._prev_trace=None
+        self._prev_filtered=None
+        self._processed=0
+    def process(self, chunk):
+        chunk=np.asarray(chunk)
+        if len(self.xcoeff)==0:
+            return np.zeros(chunk.shape,dtype=chunk.dtype)
+        if self._prev_trace is None:
+            trace=chunk
+            new_trace=np.zeros(chunk.shape,dtype=chunk.dtype)
+        else:
+            trace=np.concatenate((self._prev_trace,chunk))
+            new_trace=np.zeros(trace.shape,dtype=trace.dtype)
+            new_trace[:len(self._prev_filtered)]=self._prev_filtered
+        nprev=len(trace)-len(chunk)
+        start=nprev
+        if self._processed<self.history: # previous trace contains everything from the start
+            new_trace[nprev:self.history]=trace[nprev:self.history]
+            start=max(start,self.history)
+        iir_transform.iir_apply_complex_from(trace,new_trace,self.xcoeff,self.ycoeff,start)
+        self._processed+=len(chunk)
+        nkeep=min(self.history,len(trace))
+        self._prev_trace=trace[len(trace)-nkeep:]
+        self._prev_filtered=new_trace[len(trace)-nkeep:]
+        return new_trace[nprev:]
+    def flush(self):
+        self.reset()
+        return np.zeros(0)
+
+class LowPassStreamFilter(IStreamFilter):
+    """
+    Streaming simple single-pole low-pass filter.
+
+    Equivalent to :func:`low_pass_filter` applied to the whole trace (``"wrap"`` expansion mode is not supported).
+    The output is delayed until the first ``ceil(t*20)`` points are available (required to expand the trace start).
+    """
+    def __init__(self, t=1., mode="reflect", cval=0.):
+        if mode=="wrap":
+            raise ValueError("wrap mode is not supported for streaming")
+        self.t=t
+        self.mode=mode
+        self.cval=cval
+        self.expand_size=int(np.ceil(t*20))
+        beta=np.exp(np.double(-1.)/np.double(t))
+        alpha=np.double(1.)-beta
+        self._iir=IIRStreamFilter(np.array([alpha]),np.array([beta]))
+        IStreamFilter.__init__(self)
+    def reset(self):
+        self._iir.reset()
+        self._start_chunks=[]
+        self._started=False
+    def process(self, chunk):
+        chunk=np.asarray(chunk)
+        if self._started:
+            return self._iir.process(chunk)
+        self._start_chunks.append(chunk)
+        wf=np.concatenate(self._start_chunks)
+        if len(wf)<self.expand_size:
+            return wf[:0]
+        self._started=True
+        self._start_chunks=[]
+        wf=waveforms.expand_waveform(wf,size=self.expand_size,mode=self.mode,cval=self.cval,side="left")
+        return self._iir.process(wf)[self.expand_size:]
+    def flush(self):
+        if not self._started and self._start_chunks:
+            res=low_pass_filter(np.concatenate(self._start_chunks),self.t,mode=self.mode,cval=self.cval)
+        else:
+            res=np.zeros(0)
+        self.reset()
+        return res
+
+class LocalStreamFilter(IStreamFilter):
+    """
+    Generic streaming filter, whose output at each point only depends on the input within `span` points from it (and on the trace edges).
+
+    Args:
+        func: filter function; takes 2 arguments: a part of the trace and its position (offset) within the whole trace, and returns the filtered part.
+            The result should be independent of the part length and position everywhere except within `span` points of its edges.
+        span (int): filter span.
+        min_length (int): minimal trace length required for the filter edges to be independent of the trace length
+            (the output is delayed until this many points are available).
+    """
+    def __init__(self, func, span, min_length=0):
+        self.func=func
+        self.span=span
+        self.min_length=max(min_length,span)
+        IStreamFilter.__init__(self)
+    def reset(self):
+        self._buffer=None
+        self._buffer_start=0
+        self._out_pos=0
+    def _filter_buffer(self, final):
+        buffer_end=self._buffer_start+len(self._buffer)
+        stop=buffer_end if final else buffer_end-self.span
+        if (not final and buffer_end<self.min_length) or stop<=self._out_pos:
+            return self._buffer[:0]
+        part_start=max(self._out_pos-self.span,0)
+        part=self._buffer[part_start-self._buffer_start:]
+        res=np.asarray(self.func(part,part_start))[self._out_pos-part_start:stop-part_start]
+        self._out_pos=stop
+        new_start=max(stop-self.span,0)
+        self._buffer=self._buffer[new_start-self._buffer_start:]
+        self._buffer_start=new_start
+        return res
+    def process(self, chunk):
+        chunk=np.asarray(chunk)
+        self._buffer=chunk if self._buffer is None else np.concatenate((self._buffer,chunk))
+        return self._filter_buffer(False)
+    def flush(self):
+        res=self._filter_buffer(True) if self._buffer is not None else np.zeros(0)
+        self.reset()
+        return res
+
+class GaussianStreamFilter(LocalStreamFilter):
+    """
+    Streaming gaussian filter.
+
+    Equivalent to :func:`gaussian_filter` applied to the whole trace (``"wrap"`` expansion mode is not supported).
+    """
+    def __init__(self, width=1., mode="reflect", cval=0.):
+        if mode=="wrap":
+            raise ValueError("wrap mode is not supported for streaming")
+        span=int(np.ceil(width*6))
+        LocalStreamFilter.__init__(self,lambda wf, offset: gaussian_filter(wf,width,mode=mode,cval=cval),span,span)
+
+class SlidingStreamFilter(LocalStreamFilter):
+    """
+    Streaming sliding filter.
+
+    Equivalent to :func:`sliding_filter` applied to the whole trace (``"wrap"`` expansion mode is not supported).
+    """
+    def __init__(self, n=1, dec_mode="bin", mode="reflect", cval=0.):
+        if mode=="wrap":
+            raise ValueError("wrap mode is not supported for streaming")
+        if dec_mode not in _sliding_functions:
+            raise ValueError("unrecognized decimation type: {0}".format(dec_mode))
+        span=0 if (n is None or n<=1) else int(n)//2
+        LocalStreamFilter.__init__(self,lambda wf, offset: _sliding_reduce(wf,dec_mode,n,mode=mode,cval=cval,offset=offset),span,span)
+
+class DecimationStreamFilter(IStreamFilter):
+    """
+    Streaming decimation filter (along the first axis).
+
+    Equivalent to :func:`decimate` applied to the whole trace; the last incomplete bin is kept until :meth:`flush` is called.
+    For the parameters, see :func:`decimate`.
+    """
+    def __init__(self, n=1, dec_mode="skip", mode="drop"):
+        if not mode in ["drop", "leave"]:
+            raise ValueError("unrecognized binning mode: "+mode)
+        self.n=1 if n is None or n<=1 else int(n)
+        self.dec_mode=dec_mode
+        self.mode=mode
+        IStreamFilter.__init__(self)
+    def reset(self):
+        self._rest=None
+    def process(self, chunk):
+        chunk=np.asarray(chunk)
+        if self._rest is not None and len(self._rest):
+            chunk=np.concatenate((self._rest,chunk))
+        dec_len=(len(chunk)//self.n)*self.n
+        self._rest=chunk[dec_len:]
+        return _decimate(chunk[:dec_len],self.n,dec_mode=self.dec_mode,mode="drop")
+    def flush(self):
+        if self.mode=="leave" and self._rest is not None and len(self._rest):
+            res=_decimate(self._rest,self.n,dec_mode=self.dec_mode,mode="leave")
+        else:
+            res=np.zeros(0)
+        self.reset()
+        return res
     
 ##### Bins routines #####
 
+def _normalize_bin_distance(distance):
+    if not funcargparse.is_sequence(distance):
+        return (-distance,distance)
+    return min(distance),max(distance)
+def collect_into_bins_indices(values, distance, preserve_order=False):
+    """
+    Collect all values into bins separated at least by `distance`.
+    
+    Same as :func:`collect_into_bins`, but return a tuple ``(start, stop)`` of two index arrays, where the bin ``i`` spans indices from ``start[i]`` to ``stop[i]`` (exclusive).
+    Hence, the bins can be directly reduced using, e.g., ``np.add.reduceat(weights,start)``.
+    If ``preserve_order==False``, values are sorted before splitting, and the indices correspond to the sorted array.
+    """
+    if np.ndim(values)!=1:
+        raise ValueError("function only works with 1D arrays")
+    distance=_normalize_bin_distance(distance)
+    values=np.asarray(values)
+    if not preserve_order:
+        values=np.sort(values)
+    if len(values)==0:
+        return np.zeros(0,dtype=int),np.zeros(0,dtype=int)
+    dx=np.diff(values)
+    breaks=np.flatnonzero((dx<distance[0])|(dx>distance[1]))+1
+    start=np.concatenate(([0],breaks))
+    stop=np.concatenate((breaks,[len(values)]))
+    return start,stop
 def collect_into_bins(values, distance, preserve_order=False, to_return="value"):
     """
     Collect all values into bins separated at least by `distance`.
@@ -408,58 +748,59 @@ def collect_into_bins(values, distance, preserve_order=False, to_return="value")
     if ``to_return="index"``, it is given in indices (only useful if ``preserve_order=True``, as otherwise the indices correspond to a sorted array).
     If `distance` is a tuple, then it denotes the minimal and the maximal separation between consecutive elements;
     otherwise, it is a single number denoting maximal absolute distance (i.e., it corresponds to a tuple ``(-distance,distance)``).
+    To get the bins as index arrays, use :func:`collect_into_bins_indices`.
     """
     if np.ndim(values)!=1:
         raise ValueError("function only works with 1D arrays")
     funcargparse.check_parameter_range(to_return,"to_return",{"value","index"})
     if len(values)==0:
         return []
-    if not funcargparse.is_sequence(distance):
-        distance=(-distance,distance)
-    else:
-        distance=min(distance),max(distance)
     if not preserve_order:
         values=np.sort(values)
-    start=0
-    bins=[]
-    for i in range(1,len(values)): #TODO: numpy speedup
-        dx=values[i]-values[i-1]
-        if dx<distance[0] or dx>distance[1]:
-            bins.append((start,i-1))
-            start=i
-    bins.append((start,len(values)-1))
+    start,stop=collect_into_bins_indices(values,distance,preserve_order=True)
     if to_return=="value":
-        bins=[ (values[f],values[l]) for (f,l) in bins ]
-    return bins
+        values=np.asarray(values)
+        return list(zip(values[start],values[stop-1]))
+    return list(zip(start,stop-1))
 
+def split_into_bins_indices(values, max_span, max_size=None):
+    """
+    Split values into bins of the span at most `max_span` and number of elements at most `max_size`.
+    
+    Same as :func:`split_into_bins`, but return a tuple ``(order, start, stop)`` of index arrays,
+    where ``order`` is the sorting order of `values`, and the bin ``i`` contains indices ``order[start[i]:stop[i]]``.
+    Hence, the bins can be directly reduced using, e.g., ``np.add.reduceat(weights[order],start)``.
+    """
+    if np.ndim(values)!=1:
+        raise ValueError("function only works with 1D arrays")
+    order=np.argsort(values,kind="stable")
+    values=np.asarray(values)[order]
+    n=len(values)
+    max_size=max_size or n
+    ends=np.searchsorted(values,values+max_span,side="right") # end of the bin starting at each element (up to floating point errors)
+    start=[]
+    b=0
+    while b<n:
+        e=ends[b]
+        while e<n and values[e]-values[b]<=max_span: # correct for possible rounding errors in ``values+max_span``
+            e+=1
+        while e>b+1 and values[e-1]-values[b]>max_span:
+            e-=1
+        start.append(b)
+        b=min(max(e,b+1),b+max_size)
+    start=np.array(start,dtype=int)
+    stop=np.append(start[1:],n)
+    return order,start,stop
 def split_into_bins(values, max_span, max_size=None):
     """
     Split values into bins of the span at most `max_span` and number of elements at most `max_size`.
     
     If `max_size` is ``None``, it's assumed to be infinite.
     Return array of indices for each bin. Values are sorted before splitting.
+    To get the bins as index arrays, use :func:`split_into_bins_indices`.
     """
-    if np.ndim(values)!=1:
-        raise ValueError("function only works with 1D arrays")
-    bins=[]
-    current_bin=[]
-    start=None
-    idx=np.argsort(values)
-    values=np.sort(values)
-    for i,x in zip(idx,values):
-        if current_bin:
-            if x-start>max_span:
-                bins.append(current_bin)
-                current_bin=[]
-        if len(current_bin)==0:
-            start=x             
-        current_bin.append(i)
-        if max_size and len(current_bin)>=max_size:
-            bins.append(current_bin)
-            current_bin=[]
-    if current_bin:
-        bins.append(current_bin)
-    return bins
+    order,start,_=split_into_bins_indices(values,max_span,max_size=max_size)
+    return np.split(order,start[1:]) if len(start) else []
     
 
 
@@ -9,7 +9,7 @@ from ..utils import general as general_utils #@UnresolvedImport
 from ..utils import funcargparse #@UnresolvedImport
 from ..dataproc import callable #@UnresolvedImport
 import numpy as np
-import scipy.optimize
+import multiprocessing
 
 
 class Fitter(object):
@@ -91,8 +91,14 @@ class Fitter(object):
         except AttributeError:
             return (lambda p: p[0]), 1
     @staticmethod
+    def _is_simple_layout(template):
+        """Check if all the parameters in the template are real scalars (so that the packed parameters coincide with the unpacked ones)"""
+        return all(np.ndim(v)==0 and np.isrealobj(v) and not hasattr(v,"as_float_array") for v in template)
+    @staticmethod
     def _build_unpacker(template):
         """Build a function that unpacks an array of floats into a parameters array given the template"""
+        if Fitter._is_simple_layout(template):
+            return list
         packed=Fitter._pack_parameters(template)
         unpacker,n=Fitter._build_unpacker_single(packed,template)
         if n!=len(packed):
@@ -179,6 +185,36 @@ class Fitter(object):
                     a mean magnitude of the residuals ``mean(abs(func(x,**params)-y)**2)`` (if ``return_residual==True`` or ``return_residual=='mean'``),
                     or the total residuals including weights ``mean(abs((func(x,**params)-y)*weight)**2)`` (if ``return_residual=='weighted'``).
         """
+        p_names,fixed_parameters,bound_func,bound_jac,init_p,unpacker,kwargs=self._prepare_fit(fit_parameters,fixed_parameters,scale,limits,kwargs)
+        x,y,calc_residuals=self._prepare_data(x,y,weight)
+        res,stderr,_=self._run_fit(p_names,bound_func,bound_jac,unpacker,x,y,calc_residuals,init_p,parscore,kwargs)
+        res=unpacker(res)
+        fit_dict=dict(zip(p_names,res))
+        params_dict=fixed_parameters.copy()
+        params_dict.update(fit_dict)
+        bound_func=self.func.bind(self.xarg_name,**params_dict)
+        stderr=dict(zip(p_names,unpacker(stderr)))
+        return_val=params_dict,bound_func
+        if return_stderr:
+            return_val=return_val+(stderr,)
+        if return_residual:
+            if return_residual=="full":
+                residual=y-bound_func(*x)
+            elif return_residual=="weighted":
+                residual_w=calc_residuals(y-np.asarray(bound_func(*x)))
+                residual=(abs(residual_w)**2).sum()
+            else:
+                residual=(abs(y-bound_func(*x))**2).mean()
+            return_val=return_val+(residual,)
+        return return_val
+
+    def _prepare_fit(self, fit_parameters, fixed_parameters, scale, limits, kwargs):
+        """
+        Set up the fit parameters layout.
+
+        Return tuple ``(p_names, fixed_parameters, bound_func, bound_jac, init_p, unpacker, kwargs)``,
+        where ``bound_jac`` is the bound analytic Jacobian function (``None`` if it is not available).
+        """
         # Applying order: self.fixed_parameters < self.fit_parameters < fixed_parameters < fit_parameters
         fit_parameters=self._prepare_parameters(fit_parameters)
         filtered_fit_paremeters=general_utils.filter_dict(fixed_parameters,self.fit_parameters,exclude=True) # to ensure self.fit_parameters < fixed_parameters
@@ -187,31 +223,16 @@ class Fitter(object):
         unaccounted_parameters=self._get_unaccounted_parameters(fixed_parameters,fit_parameters)
         if len(unaccounted_parameters)>0:
             raise ValueError("Some of the function parameters are not supplied: {0}".format(unaccounted_parameters))
-        x=x if x is not None else []
-        if self.single_xarg:
-            x=[np.asarray(x)]
-        else:
-            x=[np.asarray(e) for e in x]
-        y=np.asarray(y)
-        weight=np.asarray(weight)
-        wkind=None
-        try:
-            if y.shape==(y*weight).shape:
-                wkind="point"
-        except ValueError:
-            pass
-        if wkind is None:
-            if np.prod(weight.shape)==np.prod(y.shape)**2:
-                wkind="matrix"
-                wmat_dim=np.prod(y.shape)
-                wmat=weight.reshape((wmat_dim,wmat_dim))
-            else:
-                raise ValueError("weight shape {} is incompatible with y shape {}".format(weight.shape,y.shape))
         p_names=list(fit_parameters.keys())
         bound_func=self.func.bind_namelist(self.xarg_name+p_names,**fixed_parameters)
         props=[fit_parameters[name] for name in p_names]
         init_p=self._pack_parameters(props)
         unpacker=self._build_unpacker(props)
+        if self._is_simple_layout(props) and self.func.has_jacobian(p_names):
+            bound_jac=self.func.bind_jacobian_namelist(self.xarg_name+p_names,p_names,**fixed_parameters)
+        else:
+            bound_jac=None
+        kwargs=dict(kwargs)
         if scale: # setup scale-related parameters
             scale_default=dict(zip(p_names,unpacker([np.nan]*len(init_p))))
             scale_default.update(scale)
@@ -237,14 +258,50 @@ class Fitter(object):
                 p_ibounds=[default if (b is None or np.isnan(b)) else b for b in p_ibounds]
                 p_bounds.append(p_ibounds)
             kwargs.setdefault("bounds",p_bounds)
-        if parscore:
-            parscore=callable.to_callable(parscore)
+        return p_names,fixed_parameters,bound_func,bound_jac,init_p,unpacker,kwargs
+    def _prepare_data(self, x, y, weight):
+        """
+        Normalize x and y values and set up the weighting.
+
+        Return tuple ``(x, y, calc_residuals)``, where ``calc_residuals`` is a function turning raw residuals into weighted ones.
+        """
+        x=x if x is not None else []
+        if self.single_xarg:
+            x=[np.asarray(x)]
+        else:
+            x=[np.asarray(e) for e in x]
+        y=np.asarray(y)
+        weight=np.asarray(weight)
+        wkind=None
+        try:
+            if y.shape==(y*weight).shape:
+                wkind="point"
+        except ValueError:
+            pass
+        if wkind is None:
+            if np.prod(weight.shape)==np.prod(y.shape)**2:
+                wkind="matrix"
+                wmat_dim=np.prod(y.shape)
+                wmat=weight.reshape((wmat_dim,wmat_dim))
+            else:
+                raise ValueError("weight shape {} is incompatible with y shape {}".format(weight.shape,y.shape))
         def calc_residuals(raw_res):
             if wkind=="point":
                 return (np.asarray(raw_res)*weight).flatten()
             elif wkind=="matrix":
                 y_diff_uw=np.asarray(raw_res).flatten()
                 return np.dot(wmat,y_diff_uw)
+        return x,y,calc_residuals
+    def _run_fit(self, p_names, bound_func, bound_jac, unpacker, x, y, calc_residuals, init_p, parscore, kwargs):
+        """
+        Run the least squares fit starting from the packed parameters `init_p`.
+
+        If `bound_jac` is not ``None``, it is used to calculate the analytic Jacobian (unless it is overridden in `kwargs`, or `parscore` is supplied).
+
+        Return tuple ``(res, stderr, lsqres)`` with packed fit parameters and their standard deviations, and the full :func:`scipy.optimize.least_squares` result.
+        """
+        if parscore:
+            parscore=callable.to_callable(parscore)
         def fit_func(fit_p):
             up=x+unpacker(fit_p)
             y_diff=calc_residuals(y-np.asarray(bound_func(*up)))
@@ -255,35 +312,132 @@ class Fitter(object):
                 score=parscore(**fitpar)
                 y_diff=np.append(y_diff,score)
             return y_diff
+        if bound_jac is not None and not parscore and "jac" not in kwargs:
+            def jac_func(fit_p):
+                up=x+unpacker(fit_p)
+                derivs=bound_jac(*up)
+                shape=np.broadcast(y,*derivs).shape
+                jac=np.column_stack([-calc_residuals(np.broadcast_to(d,shape)) for d in derivs])
+                if np.iscomplexobj(jac) or np.iscomplexobj(y):
+                    jac=np.concatenate((jac.real,jac.imag))
+                return jac
+            kwargs=dict(kwargs,jac=jac_func)
+        import scipy.optimize
         lsqres=scipy.optimize.least_squares(fit_func,init_p,**kwargs)
         res,jac,tot_err=lsqres.x,lsqres.jac,lsqres.fun
         try:
             cov=np.linalg.inv(np.dot(jac.transpose(),jac))*(np.sum(tot_err**2)/(len(tot_err)-len(res)))
         except np.linalg.LinAlgError: # singular matrix
             cov=None
-        res=unpacker(res)
-        fit_dict=dict(zip(p_names,res))
-        params_dict=fixed_parameters.copy()
-        params_dict.update(fit_dict)
-        bound_func=self.func.bind(self.xarg_name,**params_dict)
         if cov is None: # TODO: figure out why leastsq can return cov=None
-            stderr=dict(zip(p_names,unpacker([np.nan]*len(init_p))))
+            stderr=[np.nan]*len(res)
         else:
-            stderr=unpacker(np.diag(cov)**0.5)
-            stderr=dict(zip(p_names,stderr))
-        return_val=params_dict,bound_func
-        if return_stderr:
-            return_val=return_val+(stderr,)
-        if return_residual:
-            if return_residual=="full":
-                residual=y-bound_func(*x)
-            elif return_residual=="weighted":
-                residual_w=calc_residuals(y-np.asarray(bound_func(*x)))
-                residual=(abs(residual_w)**2).sum()
+            stderr=np.diag(cov)**0.5
+        return res,stderr,lsqres
+
+    def fit_many(self, xs=None, ys=0, fit_parameters=None, fixed_parameters=None, scale=None, limits=None, weight=1., parscore=None,
+            same_x=True, init=None, warm_start=True, return_residual="mean", processes=1, chunks_per_process=4, **kwargs):
+        """
+        Fit several datasets with the same function.
+
+        The parameter layout (packing, bounds, scales) is set up only once for all datasets, and each fit can start from the result of the previous one.
+        The datasets are split into contiguous chunks, which can be fitted in parallel in a pool of worker processes
+        (in this case, the fitter, `parscore` and all of the arguments should be picklable, e.g., `func` should be a module-level function).
+
+        Args:
+            xs: x arguments. If ``same_x==True``, they are the same for all datasets and have the same format as `x` in :meth:`fit`;
+                otherwise, `xs` is a list of such arguments, one per dataset.
+            ys: Target function values; either a 2D array with one dataset per row, or a list of arrays.
+            fit_parameters (dict): Overrides the default `fit_parameters` of the fitter.
+            fixed_parameters (dict): Overrides the default `fixed_parameters` of the fitter (same for all datasets).
+            scale (dict): Defines typical scale of fit parameters (same as in :meth:`fit`).
+            limits (dict): Boundaries for the fit parameters (same as in :meth:`fit`).
+            weight (list or numpy.ndarray): Determines the weights of y-points (same as in :meth:`fit`, and same for all datasets).
+            parscore(callable): parameter score function (same as in :meth:`fit`).
+            same_x (bool): Determines if `xs` is common for all datasets, or is given separately for each dataset.
+            init (list): If not ``None``, a list of dictionaries ``{name: value}`` with initial values of the fit parameters for each dataset
+                (missing values are taken from `fit_parameters` or from the previous fit result, depending on `warm_start`).
+            warm_start (bool): If ``True``, each fit starts from the result of the previous fit in the same chunk (unless overridden by `init`);
+                otherwise, each fit starts from `fit_parameters`.
+            return_residual: Kind of the returned residual: ``"mean"`` (mean magnitude of the residuals ``mean(abs(func(x,**params)-y)**2)``),
+                or ``"weighted"`` (total residuals including weights ``mean(abs((func(x,**params)-y)*weight)**2)``).
+            processes (int): Number of worker processes (``None`` means the number of CPUs); if it is 1, fit all datasets in the current process.
+            chunks_per_process (int): Number of chunks per worker process (larger number improves load balancing at the expense of fewer warm starts).
+            **kwargs: arguments passed to :func:`scipy.optimize.least_squares` function.
+
+        Returns:
+            numpy.ndarray: structured array with one element per dataset and fields ``"params"`` (structured field with fit parameters values),
+            ``"stderr"`` (structured field with fit parameters standard deviations, which have the same format as in :meth:`fit`), ``"residual"`` and ``"success"`` (whether the fit converged).
+            Values of the fixed parameters are the same for all datasets, so they are not included.
+        """
+        funcargparse.check_parameter_range(return_residual,"return_residual",{"mean","weighted"})
+        if isinstance(ys,np.ndarray) and ys.ndim>1:
+            ys=list(ys)
+        n=len(ys)
+        if not same_x and len(xs)!=n:
+            raise ValueError("number of x arguments {} is different from the number of datasets {}".format(len(xs),n))
+        if init is not None and len(init)!=n:
+            raise ValueError("number of initial values {} is different from the number of datasets {}".format(len(init),n))
+        p_names,_,_,_,init_p,unpacker,_=self._prepare_fit(fit_parameters,fixed_parameters,scale,limits,kwargs)
+        field_templates=[np.asarray(v) for v in unpacker(init_p)]
+        params_dtype=[(name,t.dtype if t.dtype.kind=="O" else np.result_type(t.dtype,"f8"),t.shape) for name,t in zip(p_names,field_templates)]
+        result=np.zeros(n,dtype=[("params",params_dtype),("stderr",params_dtype),("residual","f8"),("success","?")])
+        if processes is None:
+            processes=multiprocessing.cpu_count()
+        nchunks=max(min(processes*chunks_per_process,n),1) if processes>1 else 1
+        bounds=[n*i//nchunks for i in range(nchunks+1)]
+        fit_args=(fit_parameters,fixed_parameters,scale,limits,weight,parscore,warm_start,return_residual,kwargs)
+        tasks=[]
+        for b0,b1 in zip(bounds[:-1],bounds[1:]):
+            if b1>b0:
+                chunk_xs=xs if same_x else xs[b0:b1]
+                chunk_init=None if init is None else init[b0:b1]
+                tasks.append((self,chunk_xs,ys[b0:b1],same_x,chunk_init,fit_args))
+        if processes>1 and len(tasks)>1:
+            pool=multiprocessing.Pool(processes)
+            try:
+                partials=pool.map(_fit_many_chunk,tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            partials=[_fit_many_chunk(t) for t in tasks]
+        i=0
+        for chunk in partials:
+            for res,stderr,residual,success in chunk:
+                for name,v,e in zip(p_names,unpacker(res),unpacker(stderr)):
+                    result[i]["params"][name]=v
+                    result[i]["stderr"][name]=e
+                result[i]["residual"]=residual
+                result[i]["success"]=success
+                i+=1
+        return result
+    def _fit_many_serial(self, xs, ys, same_x, init, fit_args):
+        """
+        Fit all datasets sequentially, optionally using warm start.
+
+        Return list of tuples ``(res, stderr, residual, success)``, where `res` and `stderr` are packed fit parameters and their standard deviations.
+        """
+        fit_parameters,fixed_parameters,scale,limits,weight,parscore,warm_start,return_residual,kwargs=fit_args
+        p_names,_,bound_func,bound_jac,init_p,unpacker,kwargs=self._prepare_fit(fit_parameters,fixed_parameters,scale,limits,kwargs)
+        results=[]
+        start_p=init_p
+        for i,y in enumerate(ys):
+            x,y,calc_residuals=self._prepare_data(xs if same_x else xs[i],y,weight)
+            if init is not None and init[i]:
+                start_values=dict(zip(p_names,unpacker(start_p)))
+                start_values.update(self._prepare_parameters(init[i]))
+                start_p=self._pack_parameters([start_values[name] for name in p_names])
+            res,stderr,lsqres=self._run_fit(p_names,bound_func,bound_jac,unpacker,x,y,calc_residuals,start_p,parscore,kwargs)
+            raw_res=y-np.asarray(bound_func(*(x+unpacker(res))))
+            if return_residual=="weighted":
+                residual=(abs(calc_residuals(raw_res))**2).sum()
             else:
-                residual=(abs(y-bound_func(*x))**2).mean()
-            return_val=return_val+(residual,)
-        return return_val
+                residual=(abs(raw_res)**2).mean()
+            results.append((res,stderr,residual,lsqres.success))
+            start_p=res if warm_start else init_p
+        return results
+
     def initial_guess(self, fit_parameters=None, fixed_parameters=None, return_stderr=False, return_residual=False):
         """
         Return the initial guess for the fitting.
@@ -320,6 +474,11 @@ class Fitter(object):
             return_val=return_val+(0,)
         return return_val
     
+def _fit_many_chunk(args):
+    """Fit a chunk of datasets (worker function for :meth:`Fitter.fit_many`)"""
+    fitter,xs,ys,same_x,init,fit_args=args
+    return fitter._fit_many_serial(xs,ys,same_x,init,fit_args)
+
 def huge_error(x, factor=100.):
     if np.iscomplex(x):
         return (1+1j)*factor*abs(x)
@@ -65,6 +65,23 @@ def apply_window(trace_values, window="rectangle", window_power_compensate=True)
     window=specfunc.get_window_func(window)
     window_trace=window(np.arange(len(trace_values)),len(trace_values),ft_compensated=window_power_compensate)
     return trace_values*window_trace
+def _get_trace_values(trace, no_time=False):
+    """
+    Get trace values and the time step from the trace.
+
+    The trace format is the same as in :func:`fourier_transform`.
+    """
+    if trace.ndim==1:
+        trace_values=trace
+    else:
+        if trace.shape[1]==(1 if no_time else 2):
+            trace_values=trace[:,-1]
+        elif trace.shape[1]==(2 if no_time else 3):
+            trace_values=trace[:,-2]+1j*trace[:,-1]
+        else:
+            raise ValueError("fourier_transform doesn't work for an array with shape {0}".format(trace.shape))
+    dt=1. if (no_time or trace.ndim==1 or len(trace)<2) else trace[1,0]-trace[0,0]
+    return trace_values,dt
 def fourier_transform(trace, truncate=False, truncate_power=None, normalization="none", no_time=False, single_sided=False, window="rectangle", window_power_compensate=True):
     """
     Calculate a fourier transform of the trace.
@@ -91,16 +108,7 @@ def fourier_transform(trace, truncate=False, truncate_power=None, normalization=
     """
     wrapped=wrap(trace)
     column_names=["frequency","ft_data"]
-    if trace.ndim==1:
-        trace_values=trace
-    else:
-        if trace.shape[1]==(1 if no_time else 2):
-            trace_values=trace[:,-1]
-        elif trace.shape[1]==(2 if no_time else 3):
-            trace_values=trace[:,-2]+1j*trace[:,-1]
-        else:
-            raise ValueError("fourier_transform doesn't work for an array with shape {0}".format(trace.shape))
-    dt=1. if (no_time or trace.ndim==1) else trace[1,0]-trace[0,0]
+    trace_values,dt=_get_trace_values(trace,no_time=no_time)
     if len(trace_values)==0:
         return wrapped.from_array(np.zeros((0,2)),column_names,wrapped=False)
     if len(trace_values)==1:
@@ -213,6 +221,152 @@ def power_spectral_density(trace, truncate=False, truncate_power=None, normaliza
     return PSD
 
 
+class PSDAccumulator(object):
+    """
+    Streaming power spectral density estimator using Welch's method.
+    
+    The data is supplied in consecutive chunks using :meth:`add`; it is split into (possibly overlapping) segments,
+    and the power spectra of all complete segments are averaged together.
+    Only the incomplete segment at the end is stored between the calls, so the memory usage doesn't depend on the total trace length.
+    
+    Args:
+        segment_length (int): Length of a single segment.
+        overlap (float): Relative overlap between consecutive segments (between 0 and 1).
+            ``overlap=0`` with ``window="rectangle"`` corresponds to Bartlett's method.
+        dt (float): Time step between the samples.
+        normalization (str): PSD normalization (same as in :func:`power_spectral_density`).
+        single_sided (bool): If ``True``, only leave positive frequency side of the PSD.
+        window (str): FT window applied to each segment. Can be ``'rectangle'`` (essentially, no window), ``'hann'`` or ``'hamming'``.
+        window_power_compensate (bool): If ``True``, the data is multiplied by a compensating factor to preserve power in the spectrum.
+        batch_size (int): Maximal number of samples which are transformed simultaneously (the segments are transformed in batches of up to ``batch_size//segment_length``).
+    """
+    def __init__(self, segment_length, overlap=0.5, dt=1., normalization="density", single_sided=False, window="hann", window_power_compensate=True, batch_size=2**20):
+        segment_length=int(segment_length)
+        if segment_length<1:
+            raise ValueError("segment length should be positive")
+        if not 0<=overlap<1:
+            raise ValueError("overlap should be between 0 and 1")
+        if normalization not in {"none","sum","density","dBc"}:
+            raise ValueError("unrecognized normalization mode: {0}".format(normalization))
+        self.segment_length=segment_length
+        self.step=max(segment_length-int(round(overlap*segment_length)),1)
+        self.dt=dt
+        self.normalization=normalization
+        self.single_sided=single_sided
+        self.batch_size=batch_size
+        self.window=None if window=="rectangle" else specfunc.get_window_func(window)(np.arange(segment_length),segment_length,ft_compensated=window_power_compensate)
+        self.reset()
+    
+    def reset(self):
+        """Reset the accumulated data"""
+        self._buffer=np.zeros(0)
+        self._power=None
+        self._complex=False
+        self.nsegments=0
+    
+    def _to_full_power(self, power):
+        """Turn power spectrum of a real signal (calculated using ``rfft``) into the full (two-sided) spectrum"""
+        return np.concatenate((power,power[1:(self.segment_length+1)//2][::-1]))
+    def _add_segments(self, segments):
+        if self.window is not None:
+            segments=segments*self.window
+        if self._complex:
+            power=abs(fft.fft(segments,axis=1))**2
+        else:
+            power=abs(fft.rfft(segments,axis=1))**2
+        power=power.sum(axis=0)
+        self._power=power if self._power is None else self._power+power
+        self.nsegments+=len(segments)
+    def add(self, chunk):
+        """
+        Add the next chunk of data.
+        
+        `chunk` is a 1D array of (real or complex) values.
+        """
+        chunk=np.asarray(chunk)
+        if np.iscomplexobj(chunk) and not self._complex:
+            self._complex=True
+            if self._power is not None:
+                self._power=self._to_full_power(self._power)
+        data=np.concatenate((self._buffer,chunk)) if len(self._buffer) else chunk
+        n,step=self.segment_length,self.step
+        nseg=(len(data)-n)//step+1 if len(data)>=n else 0
+        if nseg:
+            segments=np.lib.stride_tricks.as_strided(data,shape=(nseg,n),strides=(data.strides[0]*step,data.strides[0]),writeable=False)
+            batch=max(self.batch_size//n,1)
+            for s in range(0,nseg,batch):
+                self._add_segments(segments[s:s+batch])
+        self._buffer=data[nseg*step:].copy()
+    
+    def get_psd(self):
+        """
+        Get the current averaged PSD.
+        
+        Return a two-column array, where the first column is frequency, and the second is positive PSD.
+        If no complete segments have been added yet, return an empty array.
+        """
+        if not self.nsegments:
+            return np.zeros((0,2))
+        n=self.segment_length
+        power=self._power/self.nsegments
+        if not self._complex:
+            power=self._to_full_power(power)
+        df=1./(self.dt*n)
+        if self.normalization=="sum":
+            power=power/n
+        elif self.normalization=="density":
+            power=power/(n**2*df)
+        elif self.normalization=="dBc":
+            power=power/(df*power[0])
+        frequencies=fft.fftfreq(n,self.dt)
+        if self.single_sided:
+            nss=(n+1)//2
+            frequencies,power=frequencies[:nss],power[:nss]
+        else:
+            frequencies,power=fft.fftshift(frequencies),fft.fftshift(power)
+        return np.column_stack((frequencies,power))
+
+def welch_power_spectral_density(trace, segment_length=2**12, overlap=0.5, normalization="density", no_time=False, single_sided=False, window="hann", window_power_compensate=True):
+    """
+    Calculate a power spectral density of the trace using Welch's method.
+    
+    The trace is split into (possibly overlapping) segments of length `segment_length`, and their PSDs are averaged,
+    which reduces the PSD noise at the expense of the frequency resolution.
+    The segments are transformed in batches, so the additional memory usage doesn't depend on the trace length.
+    To calculate the PSD of a trace supplied in parts, use :class:`PSDAccumulator`.
+    For a single segment with the rectangle window the PSD values are the same as in :func:`power_spectral_density`.
+    The frequency axis is the same for even segment lengths; for odd lengths it is symmetric around zero (same as :func:`numpy.fft.fftfreq`),
+    which is the correct axis, while in :func:`power_spectral_density` it is shifted by half of the frequency step.
+    
+    Args:
+        trace: Time trace to be transformed. Either an ``Nx2`` array, where ``trace[:,0]`` is time and ``trace[:,1]`` is data (real or complex),
+            or an ``Nx3`` array, where ``trace[:,0]`` is time, ``trace[:,1]`` is the real part of the signal and ``trace[:,2]`` is the imaginary part.
+        segment_length (int): Length of a single segment (if the trace is shorter, it is used as a single segment).
+        overlap (float): Relative overlap between consecutive segments (between 0 and 1).
+            ``overlap=0`` with ``window="rectangle"`` corresponds to Bartlett's method.
+        normalization (str): Fourier transform normalization (same as in :func:`power_spectral_density`).
+        no_time (bool): If ``True``, assume that the time axis is missing and use the standard index instead (if trace is 1D data, `no_time` is always ``True``).
+        single_sided (bool): If ``True``, only leave positive frequency side of the PSD.
+        window (str): FT window applied to each segment. Can be ``'rectangle'`` (essentially, no window), ``'hann'`` or ``'hamming'``.
+        window_power_compensate (bool): If ``True``, the data is multiplied by a compensating factor to preserve power in the spectrum.
+    
+    Returns:
+        a two-column array, where the first column is frequency, and the second is positive PSD.
+    """
+    column_names=["frequency","PSD"]
+    wrapped=wrap(trace)
+    trace_values,dt=_get_trace_values(trace,no_time=no_time)
+    if len(trace_values)==0:
+        return wrapped.from_array(np.zeros((0,2)),column_names,wrapped=False)
+    accum=PSDAccumulator(min(segment_length,len(trace_values)),overlap=overlap,dt=dt,normalization=normalization,single_sided=single_sided,
+        window=window,window_power_compensate=window_power_compensate)
+    accum.add(trace_values)
+    PSD=accum.get_psd()
+    if trace.ndim>1:
+        PSD=wrapped.from_columns((PSD[:,0],PSD[:,1]),column_names,wrapped=False)
+    return PSD
+
+
 
 def get_real_part(ft):
     """
@@ -2,13 +2,20 @@
 Digital recursive filter.
 
 Implemented using Numba library (JIT high-performance compilation); used to be a precompiled C-package.
+The kernels are compiled on the first use (see :mod:`.jit`).
+If Numba is not available, the filters are implemented using :func:`scipy.signal.lfilter` and :func:`scipy.signal.sosfilt`
+(the results are the same up to the floating point rounding errors).
 """
 
+from . import jit
+
 import numpy as np
-import numba as nb
 
 
-@nb.njit(fastmath=False,parallel=False)
+
+def _get_tstart(xcoeff, ycoeff):
+    return max(len(xcoeff)-1,len(ycoeff))
+
 def iir_apply_complex(trace, xcoeff, ycoeff):
     """
     Apply digital, (possibly) recursive filter with coefficients `xcoeff` and `ycoeff` along the first axis.
@@ -18,13 +25,122 @@ def iir_apply_complex(trace, xcoeff, ycoeff):
     new_trace=np.zeros(trace.shape,dtype=trace.dtype)
     if len(xcoeff)==0:
         return new_trace
+    tstart=_get_tstart(xcoeff,ycoeff)
+    new_trace[:tstart]=trace[:tstart]
+    iir_apply_complex_from(trace,new_trace,xcoeff,ycoeff,tstart)
+    return new_trace
+
+def iir_apply_multichannel(trace, xcoeff, ycoeff):
+    """
+    Apply digital, (possibly) recursive filter with coefficients `xcoeff` and `ycoeff` to a multi-channel trace.
+
+    `trace` is a 2D array with the first axis enumerating samples and the second enumerating channels (a 1D array is treated as a single channel).
+    Each channel is filtered independently, same as in :func:`iir_apply_complex`; if Numba is available, channels are distributed between the CPU cores.
+    """
+    trace=np.asarray(trace)
+    if trace.ndim==1:
+        return iir_apply_multichannel(trace[:,None],xcoeff,ycoeff)[:,0]
+    new_trace=np.zeros(trace.shape,dtype=trace.dtype)
+    if len(xcoeff)==0:
+        return new_trace
+    tstart=_get_tstart(xcoeff,ycoeff)
+    new_trace[:tstart]=trace[:tstart]
+    _iir_apply_multichannel(trace,new_trace,np.asarray(xcoeff),np.asarray(ycoeff),tstart)
+    return new_trace
+
+def sos_apply(trace, sos):
+    """
+    Apply digital filter in the second-order sections (SOS) form along the first axis.
+
+    `sos` is a 2D array with each row ``[b0, b1, b2, a0, a1, a2]`` describing a single section
+    (same as in :func:`scipy.signal.sosfilt`, i.e., ``a0*y[n]=b0*x[n]+b1*x[n-1]+b2*x[n-2]-a1*y[n-1]-a2*y[n-2]``),
+    and the sections are applied consecutively.
+    Compared to a single high-order filter with the same response (as in :func:`iir_apply_complex`), the SOS form is much more numerically stable.
+    `trace` is either a 1D array, or a 2D array with the first axis enumerating samples and the second enumerating channels.
+    Unlike :func:`iir_apply_complex`, the filter starts from a zero state (no initial samples are copied).
+    """
+    trace=np.asarray(trace)
+    sos=np.asarray(sos,dtype="f8")
+    if sos.ndim!=2 or sos.shape[1]!=6:
+        raise ValueError("SOS array should have shape (n,6), got {}".format(sos.shape))
+    if trace.ndim==1:
+        return sos_apply(trace[:,None],sos)[:,0]
+    dtype="c16" if np.iscomplexobj(trace) else "f8"
+    new_trace=trace.astype(dtype)
+    _sos_apply(new_trace,sos/sos[:,3:4])
+    return new_trace
+
+
+
+def _iir_apply_from_lfilter(trace, new_trace, xcoeff, ycoeff, start):
+    import scipy.signal
+    b=np.asarray(xcoeff)
+    a=np.concatenate(([1.],-np.asarray(ycoeff)))
+    if start>=len(trace):
+        return
+    nzi=max(len(a),len(b))-1
+    if nzi and start:
+        zi=scipy.signal.lfiltic(b,a,new_trace[start-1::-1][:len(a)-1],trace[start-1::-1][:len(b)-1])
+        new_trace[start:]=scipy.signal.lfilter(b,a,trace[start:],zi=zi)[0]
+    else:
+        new_trace[start:]=scipy.signal.lfilter(b,a,trace[start:])
+
+def _warmup_args(ncols):
+    def get_args():
+        args=[]
+        for dt in ["f8","c16"]:
+            trace=np.zeros((4,)+(1,)*(ncols-1),dtype=dt)
+            args.append((trace,trace.copy(),np.ones(1),np.ones(1),1))
+        return args
+    return get_args
+
+@jit.kernel(fallback=_iir_apply_from_lfilter,warmup_args=_warmup_args(1),fastmath=False,parallel=False)
+def iir_apply_complex_from(trace, new_trace, xcoeff, ycoeff, start):
+    """
+    Apply digital, (possibly) recursive filter with coefficients `xcoeff` and `ycoeff` along the first axis starting from the index `start`.
+
+    Same as :func:`iir_apply_complex`, but the filtered signal is stored in the supplied array `new_trace` (should be filled with zeros starting from `start`),
+    whose first `start` elements are assumed to be already filtered (can be used to continue filtering of a trace supplied in parts).
+    """
     nx=len(xcoeff)
     ny=len(ycoeff)
-    tstart=max(nx-1,ny)
-    new_trace[:tstart]=trace[:tstart]
-    for i in range(tstart,len(trace)):
+    for i in range(start,len(trace)):
         for xi in range(nx):
             new_trace[i]+=trace[i-xi]*xcoeff[xi]
         for yi in range(ny):
             new_trace[i]+=new_trace[i-yi-1]*ycoeff[yi]
-    return new_trace
\ No newline at end of file
+
+def _iir_apply_multichannel_lfilter(trace, new_trace, xcoeff, ycoeff, start):
+    for c in range(trace.shape[1]):
+        _iir_apply_from_lfilter(trace[:,c],new_trace[:,c],xcoeff,ycoeff,start)
+@jit.kernel(fallback=_iir_apply_multichannel_lfilter,warmup_args=_warmup_args(2),fastmath=False,parallel=True)
+def _iir_apply_multichannel(trace, new_trace, xcoeff, ycoeff, start):
+    nx=len(xcoeff)
+    ny=len(ycoeff)
+    for c in jit.prange(trace.shape[1]):
+        for i in range(start,trace.shape[0]):
+            v=new_trace[i,c]
+            for xi in range(nx):
+                v+=trace[i-xi,c]*xcoeff[xi]
+            for yi in range(ny):
+                v+=new_trace[i-yi-1,c]*ycoeff[yi]
+            new_trace[i,c]=v
+
+def _sos_apply_sosfilt(trace, sos):
+    import scipy.signal
+    trace[:]=scipy.signal.sosfilt(sos,trace,axis=0)
+@jit.kernel(fallback=_sos_apply_sosfilt,warmup_args=lambda: [(np.zeros((4,1),dtype=dt),np.array([[1.,0,0,1,0,0]])) for dt in ["f8","c16"]],fastmath=False,parallel=True)
+def _sos_apply(trace, sos):
+    if trace.shape[0]==0:
+        return
+    for c in jit.prange(trace.shape[1]):
+        for s in range(sos.shape[0]):
+            b0,b1,b2,a1,a2=sos[s,0],sos[s,1],sos[s,2],sos[s,4],sos[s,5]
+            z1=trace[0,c]*0
+            z2=z1
+            for i in range(trace.shape[0]):
+                x=trace[i,c]
+                y=b0*x+z1
+                z1=b1*x-a1*y+z2
+                z2=b2*x-a2*y
+                trace[i,c]=y
@@ -1,7 +1,6 @@
 from builtins import range
 
 import numpy as np
-import scipy.interpolate
 
 from . import waveforms
 from ..datatable import wrapping
@@ -31,6 +30,7 @@ def interpolate1D_func(x, y, kind="linear", axis=-1, copy=True, bounds_error=Tru
     if fill_values=="bounds":
         fill_values=tuple(np.take(y,[x.argmin(),x.argmax()],axis=axis))
         bounds_error=False
+    import scipy.interpolate
     return scipy.interpolate.interp1d(x,y,kind=kind,axis=axis,copy=copy,bounds_error=bounds_error,fill_value=fill_values,assume_sorted=assume_sorted)
 
 
@@ -63,6 +63,7 @@ def interpolate2D(data, x, y, method="linear", fill_value=np.nan):
     Returns:
         A 2D array with interpolated data.
     """
+    import scipy.interpolate
     interp_data=scipy.interpolate.griddata((data[:,0],data[:,1]),data[:,2],(x,y),method=method,fill_value=fill_value)
     return interp_data
 
@@ -80,6 +81,7 @@ def interpolateND(data, xs, method="linear"):
         An ND array with interpolated data.
     """
     coords=tuple([data[:,n] for n in range(data.shape[1]-1)])
+    import scipy.interpolate
     interp_data=scipy.interpolate.griddata(coords,data[:,-1],xs,method=method)
     return interp_data
         
@@ -109,6 +111,7 @@ def regular_grid_from_scatter(data, x_points, y_points, x_range=None, y_range=No
     x_grid=np.linspace(x_range[0],x_range[1],x_points)
     y_grid=np.linspace(y_range[0],y_range[1],y_points)
     xi,yi=np.meshgrid(x_grid,y_grid)
+    import scipy.interpolate
     interp_data=scipy.interpolate.griddata((data[:,0],data[:,1]),data[:,2],(xi,yi),method=method)
     return interp_data,(x_grid,y_grid)
 
@@ -0,0 +1,125 @@
+"""
+Lazily compiled numerical kernels.
+
+Numba is imported and the kernels are compiled only on their first call, so importing :mod:`.dataproc` does not incur the JIT startup cost.
+If Numba is not available, the kernels fall back to their (slower) pure Python / SciPy implementations.
+
+Compiled kernels can be cached on disk (see :func:`set_cache`); together with :func:`warmup` this moves the compilation cost
+out of short-lived processes: run ``python -m pylablib.core.dataproc.jit`` once, and the later processes simply load the compiled kernels.
+"""
+
+from __future__ import print_function
+
+import functools
+import time
+
+
+_nb=None
+_nb_checked=False
+def get_numba():
+    """Import and return Numba module, or ``None`` if it is not available"""
+    global _nb, _nb_checked, prange
+    if not _nb_checked:
+        try:
+            import numba
+            _nb=numba
+            prange=numba.prange
+        except ImportError:
+            _nb=None
+        _nb_checked=True
+    return _nb
+def is_available():
+    """Check if Numba is available"""
+    return get_numba() is not None
+
+prange=range # replaced by ``numba.prange`` when Numba is loaded (the two are equivalent in pure Python code); kernels should refer to it as ``jit.prange``
+
+
+_cache=False
+def set_cache(enabled=True):
+    """
+    Enable or disable on-disk caching of the compiled kernels.
+
+    Only affects kernels which are not compiled yet, so it should be called before any filtering is done (or use :func:`warmup` with ``cache=True``).
+    The cache is stored in ``__pycache__`` folders next to the source files (can be changed with the ``NUMBA_CACHE_DIR`` environment variable).
+    """
+    global _cache
+    _cache=enabled
+
+_kernels=[]
+class LazyKernel(object):
+    """
+    Numba kernel compiled on the first call.
+
+    Args:
+        func: Python function, which is compiled with :func:`numba.njit`.
+        fallback: function with the same signature which is used if Numba is not available; by default, use `func` itself.
+        warmup_args: list of argument tuples which are used to compile the kernel in :func:`warmup`
+            (one tuple per specialization; can also be a function returning such list, to avoid creating arrays on import).
+        jit_kwargs: additional arguments passed to :func:`numba.njit`.
+    """
+    def __init__(self, func, fallback=None, warmup_args=None, **jit_kwargs):
+        self.func=func
+        self.fallback=fallback or func
+        self.warmup_args=warmup_args
+        self.jit_kwargs=jit_kwargs
+        self._compiled=None
+        functools.update_wrapper(self,func)
+        _kernels.append(self)
+
+    def compile(self):
+        """Compile the kernel (if Numba is available) and return the resulting function"""
+        if self._compiled is None:
+            nb=get_numba()
+            if nb is None:
+                self._compiled=self.fallback
+            else:
+                self._compiled=nb.njit(cache=_cache,**self.jit_kwargs)(self.func)
+        return self._compiled
+    def is_compiled(self):
+        """Check if the kernel is already compiled"""
+        return self._compiled is not None
+
+    def warmup(self):
+        """Compile the kernel for all specializations listed in `warmup_args`"""
+        f=self.compile()
+        args_list=self.warmup_args() if callable(self.warmup_args) else (self.warmup_args or [])
+        for args in args_list:
+            f(*args)
+
+    def __call__(self, *args):
+        return self.compile()(*args)
+
+def kernel(fallback=None, warmup_args=None, **jit_kwargs):
+    """
+    Decorator for defining a lazily compiled Numba kernel.
+
+    Arguments are the same as in :class:`LazyKernel` (except for `func`).
+    """
+    def wrapper(func):
+        return LazyKernel(func,fallback=fallback,warmup_args=warmup_args,**jit_kwargs)
+    return wrapper
+
+
+def warmup(cache=None, verbose=False):
+    """
+    Compile all defined kernels for their standard specializations.
+
+    If ``cache=True``, enable on-disk caching of the compiled kernels (see :func:`set_cache`) beforehand.
+    If ``verbose==True``, print compilation time for each kernel.
+    Return ``True`` if Numba is available (i.e., the kernels were actually compiled), and ``False`` otherwise.
+    """
+    if cache is not None:
+        set_cache(cache)
+    from . import filters, iir_transform # pylint: disable=unused-import
+    for k in _kernels:
+        t0=time.time()
+        k.warmup()
+        if verbose:
+            print("{}.{}: {:.2f}s".format(k.__module__,k.__name__,time.time()-t0))
+    return is_available()
+
+
+if __name__=="__main__":
+    from pylablib.core.dataproc import jit # use the package module instance, where the kernels are registered
+    jit.warmup(cache=True,verbose=True)
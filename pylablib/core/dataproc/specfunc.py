@@ -82,6 +82,63 @@ def exp_decay_k(x, width=1., height=None, mode="causal"):
             return np.exp(-np.abs(x)/float(width))/width
         else:
             return np.exp(-np.abs(x)/float(width))*height
+
+
+
+### Kernel Jacobians ###
+## Analytic derivatives of the kernels with respect to their parameters (used by :func:`.callable.to_callable` to speed up fitting)
+
+def gaussian_k_jac(x, sigma=1., height=None):
+    """
+    Derivatives of :func:`gaussian_k` with respect to its parameters.
+
+    Return dictionary ``{name: derivative}``.
+    """
+    if height is None:
+        f=gaussian_k(x,sigma)
+        return {"sigma":f*(x**2/sigma**3-1./sigma)}
+    else:
+        e=np.exp(-x**2/(2.*sigma**2))
+        return {"sigma":e*height*x**2/sigma**3, "height":e}
+gaussian_k.jacobian=gaussian_k_jac
+
+def lorentzian_k_jac(x, gamma=1., height=None):
+    """
+    Derivatives of :func:`lorentzian_k` with respect to its parameters.
+
+    Return dictionary ``{name: derivative}``.
+    """
+    hg2=(gamma/2.)**2
+    den=x**2+hg2
+    if height is None:
+        return {"gamma":(x**2-hg2)/den**2/np.pi}
+    else:
+        return {"gamma":height*(gamma/2.)*x**2/den**2, "height":hg2/den}
+lorentzian_k.jacobian=lorentzian_k_jac
+
+def exp_decay_k_jac(x, width=1., height=None, mode="causal"):
+    """
+    Derivatives of :func:`exp_decay_k` with respect to its parameters.
+
+    Return dictionary ``{name: derivative}``.
+    """
+    width=float(width)
+    if mode=="mirror":
+        e=np.exp(-np.abs(x)/width)
+        de=e*np.abs(x)/width**2
+    else:
+        e=np.exp(-x/width)
+        de=e*x/width**2
+        if mode in {"causal","step"}:
+            e=(x>=0)*e
+            de=(x>=0)*de
+            if mode=="step":
+                e=e+(x<0)*1.
+    if height is None:
+        return {"width":de/width-e/width**2}
+    else:
+        return {"width":de*height, "height":e}
+exp_decay_k.jacobian=exp_decay_k_jac
         
         
 _kernel_functions={"gaussian":gaussian_k, "rectangle":rectangle_k, "lorentzian":lorentzian_k, "exp_decay":exp_decay_k, 
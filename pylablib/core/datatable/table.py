@@ -10,7 +10,8 @@ import numpy as np
 _depends_local=[".table_storage","..utils.strdump"]
 
 
-_storage_types={"columns":table_storage.ColumnDataTableStorage,"array":table_storage.ArrayDataTableStorage}
+_storage_types={"columns":table_storage.ColumnDataTableStorage,"array":table_storage.ArrayDataTableStorage,
+    "buffered_array":table_storage.BufferedArrayDataTableStorage}
 _default_storage_type=table_storage.ColumnDataTableStorage
 
 class DataTable(object):
@@ -32,7 +33,9 @@ class DataTable(object):
         force_copy (bool): if ``True``, make sure that the supplied data is copied
         storage_type (str): determines the type of underlying DataTable storage:
             ``'columns'`` (default) stores each column separately in an :class:`.IDataColumn` object;
-            ``'array'`` stores all the data in a 2D numpy array (limited functionality, but faster execution)
+            ``'array'`` stores all the data in a 2D numpy array (limited functionality, but faster execution);
+            ``'buffered_array'`` is the same as ``'array'``, but with a reserved space for new rows, which makes appending rows much faster
+            (suitable for building the table row by row, e.g., during data acquisition)
     """
     def __init__(self, data=None, column_names=None, transposed="auto", force_copy=True, storage_type=None):
         object.__init__(self)
@@ -763,24 +763,27 @@ class ArrayDataTableStorage(IDataTableStorage):
         Same as :meth:`get_item`, but only accepts single column index.
         """
         return self._data[idx]
-    def add_rows(self, idx, val): # accepts iterable (or 2D iterable)
-        """
-        Add new rows at index `idx` (1D).
-        """
-        if (not np.isscalar(idx)) or isinstance(idx,slice):
-            raise ValueError("can only insert items in a single location")
+    def _rows_to_array(self, val):
+        """Turn added rows `val` into a 2D numpy array"""
         v_ndim=np.ndim(val)
         if v_ndim==0:
             if self.shape[1]==0:
                 raise ValueError("can't add number to an empty table")
             else:
-                val=np.zeros((1,self.shape[1]))+val
+                return np.zeros((1,self.shape[1]))+val
         elif v_ndim==1:
-            val=np.expand_dims(as_array(val),0)
+            return np.expand_dims(as_array(val),0)
         elif v_ndim==2:
-            val=as_array(val)
+            return as_array(val)
         else:
             raise ValueError("can't assign multidimensional arrays with d>2")
+    def add_rows(self, idx, val): # accepts iterable (or 2D iterable)
+        """
+        Add new rows at index `idx` (1D).
+        """
+        if (not np.isscalar(idx)) or isinstance(idx,slice):
+            raise ValueError("can only insert items in a single location")
+        val=self._rows_to_array(val)
         if self._data is None:
             self._data=val
         else:
@@ -807,4 +810,72 @@ class ArrayDataTableStorage(IDataTableStorage):
         Expand the table. Usually fill with zeros, unless the column values can be auto-predicted.
         """
         if self.shape[1]!=0:
-            self.add_rows(self.shape[0],np.zeros((length,self.shape[1])))
\ No newline at end of file
+            self.add_rows(self.shape[0],np.zeros((length,self.shape[1])))
+
+
+
+
+
+
+class BufferedArrayDataTableStorage(ArrayDataTableStorage):
+    """
+    Table storage which stores the data as a 2D numpy array with a reserved space for additional rows.
+
+    Same as :class:`ArrayDataTableStorage`, but appending rows to the end of the table takes amortized constant time:
+    the data is stored in a larger buffer, whose capacity grows geometrically when it is filled.
+    Suitable for building the table row by row (e.g., during data acquisition).
+
+    Args:
+        columns: table data; can be a numpy array, a list of columns, or a 2D list
+        names(list): list of column names; by default, the column names are autogenerated: ``"col00"``, ``"col01"``, etc.
+        transposed: if ``True``, the `columns` arguments is assumed to be column-wise (list of columns)
+            if ``False``, the `columns` arguments is assumed to be row-wise (list of rows)
+            if ``"auto"``, assumed to be ``False`` for numpy arrays and ``True`` otherwise
+        force_copy (bool): if ``True``, make sure that the supplied data is copied
+        min_capacity (int): minimal number of rows in the buffer
+        growth_factor (float): factor by which the buffer capacity is increased when it is filled
+    """
+    def __init__(self, columns=None, names=None, transposed="auto", force_copy=True, min_capacity=16, growth_factor=2.):
+        self._buffer=None
+        self.min_capacity=min_capacity
+        self.growth_factor=growth_factor
+        ArrayDataTableStorage.__init__(self,columns,names,transposed=transposed,force_copy=force_copy)
+
+    def capacity(self):
+        """Get the number of rows which the table can hold without reallocating the data"""
+        if self._buffer is None or self._data is None or self._data.base is not self._buffer:
+            return self.shape[0]
+        return len(self._buffer)
+    def reserve(self, nrows, dtype=None):
+        """
+        Make sure that the table can hold at least `nrows` rows of the given `dtype` (by default, the current data dtype) without reallocating the data.
+        """
+        if self._data is None:
+            return
+        dtype=self._data.dtype if dtype is None else np.dtype(dtype)
+        if self.capacity()<nrows or self._data.dtype!=dtype:
+            n=self.shape[0]
+            nrows=max(nrows,self.min_capacity,int(self.capacity()*self.growth_factor))
+            self._buffer=np.empty((nrows,self.shape[1]),dtype=dtype)
+            self._buffer[:n]=self._data
+            self._data=self._buffer[:n]
+    def copy(self):
+        return BufferedArrayDataTableStorage(self._data.copy(),list(self._column_names),min_capacity=self.min_capacity,growth_factor=self.growth_factor)
+
+    def add_rows(self, idx, val): # accepts iterable (or 2D iterable)
+        """
+        Add new rows at index `idx` (1D).
+        """
+        if self._data is None or not np.isscalar(idx) or idx!=self.shape[0]: # only appending to the end is buffered
+            return ArrayDataTableStorage.add_rows(self,idx,val)
+        val=self._rows_to_array(val)
+        if val.shape[1]!=self.shape[1]:
+            raise ValueError("invalid shape of added rows")
+        n,nadd=self.shape[0],val.shape[0]
+        self.reserve(n+nadd,np.result_type(self._data,val))
+        self._buffer[n:n+nadd]=val
+        self._data=self._buffer[:n+nadd]
+    def get_subtable(self, idx, force_copy=True):
+        """Return the data at the index `idx` (1D or 2D) as an `IDataTableStorage` object of the same type."""
+        subtable=ArrayDataTableStorage.get_subtable(self,idx,force_copy=force_copy)
+        return BufferedArrayDataTableStorage(subtable._data,subtable._column_names,force_copy=False,min_capacity=self.min_capacity,growth_factor=self.growth_factor)
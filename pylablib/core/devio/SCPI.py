@@ -1,7 +1,9 @@
 import time
 import contextlib
 
-from ..utils.py3 import textstring, as_str
+import numpy as np
+
+from ..utils.py3 import textstring, as_str, as_builtin_bytes
 from . import data_format
 from . import backend as backend_module  #@UnresolvedImport
 from ..utils import general as general_utils  #@UnresolvedImport
@@ -40,6 +42,9 @@ class SCPIDevice(backend_module.IBackendWrapper):
     _default_wait_callback_timeout=.3 # callback call period during wait operations (keeps the thread from complete halting)
     _default_failsafe=False # running in the failsafe mode by default
     _allow_concatenate_write=True # allow automatic concatenation of several write operations (see :meth:`using_write_buffer`)
+    _default_batch_info_queries=False # combine queries made while getting info nodes (settings, status) into batches (see :meth:`set_batch_info_queries`)
+    _max_batch_queries=16 # maximal number of queries combined in a single message by :meth:`ask_multiple`
+    _trace_term_timeout=0.1 # timeout for receiving an (optional) line terminator after a binary data block (see :meth:`read_trace_data`)
     def __init__(self, conn, term_write=None, term_read=None, wait_callback=None, backend="visa", failsafe=None, timeout=None, backend_params=None):
         self._wait_sync_timeout=self._default_wait_sync_timeout
         failsafe=self._default_failsafe if failsafe is None else failsafe
@@ -68,6 +73,10 @@ class SCPIDevice(backend_module.IBackendWrapper):
         self._concatenate_write=0
         self._write_buffer=""
         self._debug_conn=False
+        self._batch_info_queries=self._default_batch_info_queries
+        self._info_query_plans={}
+        self._prefetched_replies=None
+        self._recorded_queries=None
     
     
     def _instr_read(self, raw=False):
@@ -284,6 +293,8 @@ class SCPIDevice(backend_module.IBackendWrapper):
             read_echo_delay (float): The delay between write and read if ``read_echo==True``.
         """
         msg=self._compose_msg(msg,arg,arg_type,unit,fmt,bool_selector)
+        if self._prefetched_replies:
+            self._prefetched_replies.clear() # device state might change, so the prefetched replies are no longer valid
         self._write_retry(msg)
         if read_echo:
             try:
@@ -336,6 +347,10 @@ class SCPIDevice(backend_module.IBackendWrapper):
         `msg` is the query message, `delay` is the delay between write and read. Other parameters are the same as in :meth:`read`.
         If ``read_echo==True``, assume that the device first echoes the input and skip it.
         """
+        if (self._recorded_queries is not None) and self._is_batchable_query(msg) and data_type!="raw" and not (delay or timeout is not None or read_echo):
+            self._recorded_queries.append(msg)
+            if self._prefetched_replies and msg in self._prefetched_replies:
+                return self._parse_msg(self._prefetched_replies[msg],data_type=data_type)
         for t in general_utils.RetryOnException(self._retry_times,exceptions=ValueError):
             with t:
                 if read_echo:
@@ -351,6 +366,45 @@ class SCPIDevice(backend_module.IBackendWrapper):
             self.sleep(0.5)
             self.flush()
             self._try_recover(t.try_number)
+    @staticmethod
+    def _is_batchable_query(msg):
+        """
+        Check if the query can be combined with other queries in :meth:`_get_info` batches.
+
+        Only queries with the full command path (starting with ``":"``) or common commands (starting with ``"*"``) are batched,
+        since in a combined message the relative commands are resolved with respect to the previous command header.
+        """
+        return msg.startswith(":") or msg.startswith("*")
+    def _ask_batch(self, queries, timeout=None):
+        """
+        Send `queries` joined with ``";"`` and split the reply into the list of replies.
+
+        The reply is split on all ``";"`` characters, so a string reply containing ``";"`` breaks the split
+        (usually resulting in :exc:`ValueError` because of the mismatched number of replies).
+        """
+        reply=as_str(self._ask_retry(";".join(queries),timeout=timeout)).strip()
+        replies=reply.split(";")
+        if len(replies)!=len(queries):
+            raise ValueError("number of replies {0} doesn't agree with the number of queries {1}".format(len(replies),len(queries)))
+        return replies
+    def ask_multiple(self, queries, data_type="string", timeout=None):
+        """
+        Send several queries combined in a single message and read all the replies at once.
+
+        `queries` is a list of query messages, which are joined with ``";"`` (so they should specify the full command path, e.g., start with ``":"``).
+        The replies should not contain ``";"`` characters (e.g., inside strings), since they are used to split the combined reply.
+        `data_type` is either a single data type for all the replies, or a list of data types for each reply (same as in :meth:`read`, except for ``"raw"``).
+        The device is expected to return all replies in a single line separated by ``";"`` (the standard SCPI behavior);
+        if the number of replies doesn't agree with the number of queries, raise :exc:`ValueError`.
+        If there are more than `_max_batch_queries` queries, they are split into several messages.
+        Return list of parsed replies.
+        """
+        if isinstance(data_type,textstring):
+            data_type=[data_type]*len(queries)
+        replies=[]
+        for start in range(0,len(queries),self._max_batch_queries):
+            replies+=self._ask_batch(queries[start:start+self._max_batch_queries],timeout=timeout)
+        return [self._parse_msg(r,dt) for r,dt in zip(replies,data_type)]
     def flush(self, one_line=False):
         """
         Flush the read buffer (read all the available data and return the number of bytes read).
@@ -375,23 +429,144 @@ class SCPIDevice(backend_module.IBackendWrapper):
         ``'#'``, then a single digit ``s`` denoting length of the size block,
         then ``s`` digits denoting length of the data (in bytes) followed by the actual data.
         """
-        if data[:1]!="#": # range access to accommodate for bytes type in Py3
+        data=as_builtin_bytes(data)
+        if data[:1]!=b"#": # range access to accommodate for bytes type in Py3
             raise ValueError("malformed data")
         len_size=int(data[1:2]) # range access to accommodate for bytes type in Py3
         length=int(data[2:2+len_size])
-        data=data[2+len_size:]
+        data=memoryview(data)[2+len_size:] # avoid copying the data
         if len(data)!=length:
-            if len(data)>length and data[length:]=='\n'*(len(data)-length):
+            if len(data)>length and data[length:].tobytes()==b"\n"*(len(data)-length):
                 data=data[:length]
             else:
                 if len(data)>length:
-                    trailing_bytes="; the trailing bytes are {0}".format(".".join([str(ord(c)) for c in data[length:]]))
+                    trailing_bytes="; the trailing bytes are {0}".format(".".join([str(c) for c in bytearray(data[length:])]))
                 else:
                     trailing_bytes=""
                 raise ValueError("data length {0} doesn't agree with the declared length {1}".format(len(data),length)+trailing_bytes)
         fmt=data_format.DataFormat.from_desc(fmt)
         return fmt.convert_from_str(data)
+    def _read_trace_block(self, fmt):
+        header=bytearray(2)
+        if self.instr.read_into(header)!=2 or header[:1]!=b"#":
+            raise ValueError("malformed data")
+        len_size=int(header[1:2])
+        if len_size==0:
+            raise ValueError("indefinite-length data blocks are not supported")
+        length=bytearray(len_size)
+        if self.instr.read_into(length)!=len_size:
+            raise ValueError("malformed data")
+        length=int(length)
+        dtype=np.dtype(fmt.to_desc("numpy"))
+        if length%dtype.itemsize:
+            raise ValueError("data length {0} is not a multiple of the element size {1}".format(length,dtype.itemsize))
+        data=np.empty(length//dtype.itemsize,dtype=dtype)
+        nread=self.instr.read_into(data)
+        if nread!=length:
+            raise ValueError("data length {0} doesn't agree with the declared length {1}".format(nread,length))
+        trailing=self.instr.read_trailing_term(timeout=self._trace_term_timeout)
+        if self._debug_conn:
+            debug_msg="Reading data block from instr: {} bytes; trailing data {}".format(length,trailing)
+            log.default_log.debug(debug_msg,origin="devices/SCPI",level="misc")
+        if trailing.strip():
+            raise ValueError("unexpected data after the data block: {0}".format(trailing))
+        return data
+    def _read_trace_retry(self, fmt, msg=None, timeout=None):
+        self._write_retry(flush=True)
+        retry=(msg is not None) and (timeout is None) # only a query can be repeated, since the data is lost after a failed read
+        timeout=self._operation_timeout if timeout is None else timeout
+        for t in general_utils.RetryOnException(self._retry_times,exceptions=(self.instr.Error,ValueError)):
+            with t:
+                with self.instr.locking(timeout=timeout):
+                    with self.instr.using_timeout(timeout):
+                        try:
+                            if msg is not None:
+                                self._instr_write(msg)
+                            return self._read_trace_block(fmt)
+                        except (self.instr.Error,ValueError):
+                            self.flush() # remove the rest of the data block
+                            raise
+            if not retry:
+                t.reraise()
+            error_msg="trace data read raises error; waiting {0} sec before trying to recover".format(self._retry_delay)
+            log.default_log.info(error_msg,origin="devices/SCPI",level="warning")
+            self.sleep(self._retry_delay)
+            self._try_recover(t.try_number)
+    def read_trace_data(self, fmt, timeout=None):
+        """
+        Read the trace data returned by the device. `fmt` is :class:`.DataFormat` description.
+
+        The data is assumed to be in the same format as in :meth:`parse_trace_data`.
+        For binary formats, the block header is read first, and then the data is received directly into a preallocated numpy array
+        (avoiding intermediate string copies); the line terminator following the data block is read and discarded, if it is present.
+        On a failed read the rest of the data is flushed.
+        `timeout` overrides the default value.
+        """
+        fmt=data_format.DataFormat.from_desc(fmt)
+        if fmt.is_ascii():
+            return self.parse_trace_data(self.read("raw",timeout=timeout),fmt)
+        return self._read_trace_retry(fmt,timeout=timeout)
+    def ask_trace_data(self, msg, fmt, timeout=None):
+        """
+        Send the query `msg` and read the returned trace data.
+
+        `fmt` is :class:`.DataFormat` description; the data is read using :meth:`read_trace_data`.
+        In the fail-safe mode, the query is repeated on communication errors or malformed data.
+        """
+        fmt=data_format.DataFormat.from_desc(fmt)
+        if fmt.is_ascii():
+            return self.parse_trace_data(self.ask(msg,"raw",timeout=timeout),fmt)
+        return self._read_trace_retry(fmt,msg=msg,timeout=timeout)
     
+    def set_batch_info_queries(self, enabled=True):
+        """
+        Enable or disable combining the queries made while getting the info nodes into batches (see :meth:`_get_info`).
+
+        The stored query plans are cleared, so that the batching is retried even if it has previously failed.
+        """
+        self._batch_info_queries=enabled
+        self._info_query_plans={}
+    def _get_info(self, kinds, nodes=None):
+        """
+        Get dict ``{name: value}`` containing all the device settings.
+
+        If batch info queries are enabled (see :meth:`set_batch_info_queries`), the queries made by the node getters are recorded,
+        and on the next call with the same arguments they are sent beforehand in batches using :meth:`ask_multiple`;
+        the getters then use the prefetched replies instead of querying the device one by one.
+        Only queries with the full command path (starting with ``":"`` or ``"*"``) are batched.
+        Queries which were not prefetched (e.g., because of the different branches taken in the getters) are sent as usual,
+        and all the prefetched replies are discarded after the first :meth:`write` call.
+        If the device doesn't support combined queries (the batch query fails), fall back to the usual one-by-one querying.
+        """
+        if not self._batch_info_queries or self._recorded_queries is not None:
+            return backend_module.IBackendWrapper._get_info(self,kinds,nodes=nodes)
+        plan_key=(tuple(kinds),None if nodes is None else tuple(sorted(nodes)))
+        plan=self._info_query_plans.get(plan_key,[])
+        replies={}
+        if plan:
+            try:
+                for start in range(0,len(plan),self._max_batch_queries):
+                    batch=plan[start:start+self._max_batch_queries]
+                    replies.update(zip(batch,self._ask_batch(batch)))
+            except (ValueError,self.instr.Error):
+                self.flush()
+                self._info_query_plans[plan_key]=None # batching is not supported
+                replies={}
+        self._prefetched_replies=replies
+        self._recorded_queries=[]
+        try:
+            info=backend_module.IBackendWrapper._get_info(self,kinds,nodes=nodes)
+        finally:
+            recorded=self._recorded_queries
+            self._prefetched_replies=None
+            self._recorded_queries=None
+        if self._info_query_plans.get(plan_key,[]) is not None:
+            plan=[]
+            for q in recorded:
+                if q not in plan:
+                    plan.append(q)
+            self._info_query_plans[plan_key]=plan
+        return info
     def apply_settings(self, settings):
         """
         Apply the settings.
@@ -135,6 +135,29 @@ class IDeviceBackend(object):
         If `size` is not None, read `size` bytes (the standard timeout applies); otherwise, read all available data (return immediately).
         """
         raise NotImplementedError("IDeviceBackend.read")
+    def read_into(self, buf):
+        """
+        Read data from the device into a writable buffer `buf` (e.g., ``bytearray`` or a contiguous numpy array).
+
+        Read as many bytes as `buf` holds (the standard timeout applies), and return the number of bytes read.
+        By default, uses :meth:`read`; backends which support it receive the data directly into `buf` without intermediate copies.
+        """
+        view=memoryview(buf).cast("B")
+        data=py3.as_builtin_bytes(self.read(len(view)))
+        view[:len(data)]=data
+        return len(data)
+    def read_trailing_term(self, timeout=None):
+        """
+        Read the line terminator following the data read by :meth:`read_into`, if it is present.
+
+        Wait for at most `timeout` seconds (if ``None``, use the default device timeout); if no terminator is received, return the data read so far.
+        Return the read data (including the terminator).
+        """
+        with self.using_timeout(timeout):
+            try:
+                return py3.as_builtin_bytes(self.readline(remove_term=False,skip_empty=False))
+            except self.Error:
+                return b""
     def flush_read(self):
         """Flush the device output (read all the available data; return the number of bytes read)."""
         return len(self.read())
@@ -173,7 +196,185 @@ def remove_longest_term(msg, terms):
         if msg.endswith(py3.as_builtin_bytes(t)):
             tcs=max(tcs,len(t))
     return msg[:-tcs]
-    
+
+
+
+class IStreamDeviceBackend(IDeviceBackend):
+    """
+    An abstract class for a stream device backend (e.g., serial port) with a read-ahead buffer.
+
+    Instead of reading one byte at a time while looking for the terminators, the data is read in blocks of all the currently available bytes;
+    the bytes after the terminator are kept in the buffer and are used in the subsequent read operations.
+
+    Subclasses need to define `instr` attribute with ``read(size)`` method and, preferably, ``in_waiting`` attribute (or ``inWaiting()`` method).
+    They can also override :meth:`single_op` context manager, which wraps each read operation.
+    """
+    _read_block_size=2**16
+    def __init__(self, conn, timeout=None, term_write=None, term_read=None, datatype="auto"):
+        IDeviceBackend.__init__(self,conn,timeout=timeout,term_write=term_write,term_read=term_read,datatype=datatype)
+        self._read_buffer=bytearray()
+
+    def single_op(self):
+        """Context manager for a single operation (does nothing by default)."""
+        return general.DummyResource()
+    def _read_instr(self, size):
+        """Read up to `size` bytes from the device (blocking until the timeout)"""
+        return self.instr.read(size)
+    def _read_instr_into(self, view):
+        """Read up to ``len(view)`` bytes from the device directly into `view`; return the number of bytes read"""
+        try:
+            readinto=self.instr.readinto
+        except AttributeError:
+            data=self._read_instr(len(view))
+            view[:len(data)]=data
+            return len(data)
+        return readinto(view) or 0
+    def _get_available_size(self):
+        """Get the number of bytes which can be read immediately (0 if unknown)"""
+        try:
+            return self.instr.in_waiting
+        except AttributeError:
+            pass
+        try:
+            return self.instr.inWaiting()
+        except AttributeError:
+            return 0
+    def _timeout_error(self):
+        """Create an error which is raised on a read timeout"""
+        return self.Error("timeout during read")
+    def _read_size_error(self, size, read_size):
+        """Create an error which is raised if fewer bytes than requested are read"""
+        return self.Error("read returned less than expected: {} instead of {}".format(read_size,size))
+    def _clear_read_buffer(self):
+        """Discard the data in the read-ahead buffer"""
+        del self._read_buffer[:]
+    def _pop_read_buffer(self, size=None):
+        buf=self._read_buffer
+        if size is None or size>=len(buf):
+            result=bytes(buf)
+            del buf[:]
+        else:
+            result=bytes(buf[:size])
+            del buf[:size]
+        return result
+    def _read_available_block(self):
+        """
+        Read a block of data into the buffer and return its length.
+
+        The block contains all the currently available bytes, but at least 1 (in which case the timeout applies).
+        """
+        size=min(max(self._get_available_size(),1),self._read_block_size)
+        c=self._read_instr(size)
+        self._read_buffer+=c
+        return len(c)
+    @staticmethod
+    def _find_terms(buf, terms, start=0):
+        """Find the position right after the earliest terminator in the buffer (starting from `start`); return ``None`` if none are found"""
+        end=None
+        for t in terms:
+            pos=buf.find(t,start)
+            if pos>=0 and (end is None or pos+len(t)<end):
+                end=pos+len(t)
+        return end
+    def _read_terms(self, terms=(), timeout=None, error_on_timeout=True):
+        terms=[py3.as_builtin_bytes(t) for t in terms]
+        max_term_len=max([len(t) for t in terms]) if terms else 0
+        with self.single_op():
+            with self.using_timeout(timeout):
+                start=0
+                while True:
+                    if terms:
+                        end=self._find_terms(self._read_buffer,terms,start)
+                        if end is not None:
+                            return self._pop_read_buffer(end)
+                        start=max(len(self._read_buffer)-max_term_len+1,0) # terminators can be split between the blocks
+                    if not self._read_available_block():
+                        result=self._pop_read_buffer()
+                        if error_on_timeout and terms:
+                            raise self._timeout_error()
+                        return result
+    def readline(self, remove_term=True, timeout=None, skip_empty=True, error_on_timeout=True):
+        """
+        Read a single line from the device.
+
+        Args:
+            remove_term (bool): If ``True``, remove terminal characters from the result.
+            timeout: Operation timeout. If ``None``, use the default device timeout.
+            skip_empty (bool): If ``True``, ignore empty lines (works only for ``remove_term==True``).
+            error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
+        """
+        while True:
+            result=self._read_terms(self.term_read or [],timeout=timeout,error_on_timeout=error_on_timeout)
+            self.cooldown()
+            if remove_term and self.term_read:
+                result=remove_longest_term(result,self.term_read)
+            if not (skip_empty and remove_term and (not result)):
+                break
+        return self._to_datatype(result)
+    def read(self, size=None, error_on_timeout=True):
+        """
+        Read data from the device.
+
+        If `size` is not None, read `size` bytes (usual timeout applies); otherwise, read all available data (return immediately).
+        """
+        with self.single_op():
+            if size is None:
+                result=self._read_terms(timeout=0,error_on_timeout=error_on_timeout)
+            else:
+                result=self._pop_read_buffer(size)
+                if len(result)<size:
+                    result=result+self._read_instr(size-len(result))
+                if len(result)!=size:
+                    raise self._read_size_error(size,len(result))
+            self.cooldown()
+            return self._to_datatype(result)
+    def read_into(self, buf):
+        """
+        Read data from the device into a writable buffer `buf` (e.g., ``bytearray`` or a contiguous numpy array).
+
+        Read as many bytes as `buf` holds (usual timeout applies), and return the number of bytes read.
+        The data is received directly into `buf` (apart from the part which is already in the read-ahead buffer).
+        """
+        view=memoryview(buf).cast("B")
+        size=len(view)
+        with self.single_op():
+            nread=0
+            if self._read_buffer:
+                nread=min(len(self._read_buffer),size)
+                view[:nread]=self._pop_read_buffer(nread)
+            while nread<size:
+                n=self._read_instr_into(view[nread:])
+                if not n:
+                    raise self._read_size_error(size,nread)
+                nread+=n
+            self.cooldown()
+            return size
+    def read_trailing_term(self, timeout=None):
+        """
+        Read the line terminator following the data read by :meth:`read_into`, if it is present.
+
+        Wait for at most `timeout` seconds (if ``None``, use the default device timeout); if no terminator is received, return the data read so far.
+        Return the read data (including the terminator).
+        """
+        return self._read_terms(self.term_read or [],timeout=timeout,error_on_timeout=False)
+    def read_multichar_term(self, term, remove_term=True, timeout=None, error_on_timeout=True):
+        """
+        Read a single line with multiple possible terminators.
+
+        Args:
+            term: Either a string (single multi-char terminator) or a list of strings (multiple terminators).
+            remove_term (bool): If ``True``, remove terminal characters from the result.
+            timeout: Operation timeout. If ``None``, use the default device timeout.
+            error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
+        """
+        if isinstance(term,anystring):
+            term=[term]
+        result=self._read_terms(term,timeout=timeout,error_on_timeout=error_on_timeout)
+        self.cooldown()
+        if remove_term and term:
+            result=remove_longest_term(result,term)
+        return self._to_datatype(result)
+
 
 
 ### Specific backends ###
@@ -352,6 +553,36 @@ try:
             result=self.instr.read_raw(size=size)
             self.cooldown()
             return self._to_datatype(result)
+        def read_into(self, buf):
+            """
+            Read data from the device into a writable buffer `buf` (e.g., ``bytearray`` or a contiguous numpy array).
+
+            Read as many bytes as `buf` holds (the standard timeout applies), and return the number of bytes read.
+            Unlike :meth:`read`, does not stop at the end of the message (if supported by the pyVISA version).
+            """
+            self._read_ended=False
+            if not hasattr(self.instr,"read_bytes"):
+                return IDeviceBackend.read_into(self,buf)
+            view=memoryview(buf).cast("B")
+            data=self.instr.read_bytes(len(view))
+            view[:len(data)]=data
+            try:
+                self._read_ended=(self.instr.last_status==visa.constants.StatusCode.success) # the message end (END) is received
+            except AttributeError:
+                pass
+            self.cooldown()
+            return len(data)
+        def read_trailing_term(self, timeout=None):
+            """
+            Read the line terminator following the data read by :meth:`read_into`, if it is present.
+
+            If the last :meth:`read_into` call received the end of the message, return immediately;
+            otherwise, wait for at most `timeout` seconds (if ``None``, use the default device timeout).
+            Return the read data (including the terminator).
+            """
+            if getattr(self,"_read_ended",False):
+                return b""
+            return IDeviceBackend.read_trailing_term(self,timeout=timeout)
         
         def write(self, data, flush=True, read_echo=False, read_echo_delay=0, read_echo_lines=1):
             """
@@ -385,7 +616,7 @@ except ImportError:
 try:
     import serial
 
-    class SerialDeviceBackend(IDeviceBackend):
+    class SerialDeviceBackend(IStreamDeviceBackend):
         """
         Serial backend (via pySerial).
         
@@ -427,7 +658,7 @@ try:
                 term_read=b"\n"
             if isinstance(term_read,anystring):
                 term_read=[term_read]
-            IDeviceBackend.__init__(self,conn_dict.copy(),term_write=term_write,term_read=term_read,datatype=datatype)
+            IStreamDeviceBackend.__init__(self,conn_dict.copy(),term_write=term_write,term_read=term_read,datatype=datatype)
             port=conn_dict.pop("port")
             try:
                 self.instr=serial.serial_for_url(port,do_not_open=True,**conn_dict)
@@ -453,6 +684,7 @@ try:
         def _do_close(self):
             #general.retry_wait(self.instr.flush, self._open_retry_times, 0.3)
             general.retry_wait(self.instr.close, self._open_retry_times, 0.3)
+            self._clear_read_buffer()
         def open(self):
             """Open the connection."""
             if not self._connect_on_operation and not self.opened:
@@ -510,76 +742,6 @@ try:
             return self.instr.timeout
         
         
-        def _read_terms(self, terms=(), timeout=None, error_on_timeout=True):
-            result=b""
-            singlechar_terms=all(len(t)==1 for t in terms)
-            terms=[py3.as_builtin_bytes(t) for t in terms]
-            with self.single_op():
-                with self.using_timeout(timeout):
-                    while True:
-                        c=self.instr.read(1 if terms else 8)
-                        result=result+c
-                        if c==b"":
-                            if error_on_timeout and terms:
-                                raise self.Error("timeout during read")
-                            return result
-                        if singlechar_terms:
-                            if c in terms:
-                                return result
-                        else:
-                            for t in terms:
-                                if result.endswith(t):
-                                    return result
-        def readline(self, remove_term=True, timeout=None, skip_empty=True, error_on_timeout=True):
-            """
-            Read a single line from the device.
-            
-            Args:
-                remove_term (bool): If ``True``, remove terminal characters from the result.
-                timeout: Operation timeout. If ``None``, use the default device timeout.
-                skip_empty (bool): If ``True``, ignore empty lines (works only for ``remove_term==True``).
-                error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
-            """
-            while True:
-                result=self._read_terms(self.term_read or [],timeout=timeout,error_on_timeout=error_on_timeout)
-                self.cooldown()
-                if remove_term and self.term_read:
-                    result=remove_longest_term(result,self.term_read)
-                if not (skip_empty and remove_term and (not result)):
-                    break
-            return self._to_datatype(result)
-        def read(self, size=None, error_on_timeout=True):
-            """
-            Read data from the device.
-            
-            If `size` is not None, read `size` bytes (usual timeout applies); otherwise, read all available data (return immediately).
-            """
-            with self.single_op():
-                if size is None:
-                    result=self._read_terms(timeout=0,error_on_timeout=error_on_timeout)
-                else:
-                    result=self.instr.read(size=size)
-                    if len(result)!=size:
-                        raise self.Error("read returned less than expected: {} instead of {}".format(len(result),size))
-                self.cooldown()
-                return self._to_datatype(result)
-        def read_multichar_term(self, term, remove_term=True, timeout=None, error_on_timeout=True):
-            """
-            Read a single line with multiple possible terminators.
-            
-            Args:
-                term: Either a string (single multi-char terminator) or a list of strings (multiple terminators).
-                remove_term (bool): If ``True``, remove terminal characters from the result.
-                timeout: Operation timeout. If ``None``, use the default device timeout.
-                error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
-            """
-            if isinstance(term,anystring):
-                term=[term]
-            result=self._read_terms(term,timeout=timeout,error_on_timeout=error_on_timeout)
-            self.cooldown()
-            if remove_term and term:
-                result=remove_longest_term(result,term)
-            return self._to_datatype(result)
         def write(self, data, flush=True, read_echo=False, read_echo_delay=0, read_echo_lines=1):
             """
             Write data to the device.
@@ -617,7 +779,7 @@ except ImportError:
 try:
     import ft232
 
-    class FT232DeviceBackend(IDeviceBackend):
+    class FT232DeviceBackend(IStreamDeviceBackend):
         """
         FT232 backend (via pyft232).
         
@@ -659,7 +821,7 @@ try:
                 term_read=b"\n"
             if isinstance(term_read,anystring):
                 term_read=[term_read]
-            IDeviceBackend.__init__(self,conn_dict.copy(),term_write=term_write,term_read=term_read,datatype=datatype)
+            IStreamDeviceBackend.__init__(self,conn_dict.copy(),term_write=term_write,term_read=term_read,datatype=datatype)
             port=conn_dict.pop("port")
             self.opened=False
             try:
@@ -685,6 +847,7 @@ try:
             if self.is_opened():
                 general.retry_wait(self.instr.close, self._open_retry_times, 0.3)
                 self.opened=False
+                self._clear_read_buffer()
         def open(self):
             """Open the connection."""
             self._do_open()
@@ -725,76 +888,10 @@ try:
             return self.instr.timeout
         
         
-        def _read_terms(self, terms=(), timeout=None, error_on_timeout=True):
-            result=b""
-            singlechar_terms=all(len(t)==1 for t in terms)
-            terms=[py3.as_builtin_bytes(t) for t in terms]
-            with self.single_op():
-                with self.using_timeout(timeout):
-                    while True:
-                        c=self.instr.read(1 if terms else 8)
-                        result=result+c
-                        if c==b"":
-                            if error_on_timeout and terms:
-                                raise self.Error(4)
-                            return result
-                        if singlechar_terms:
-                            if c in terms:
-                                return result
-                        else:
-                            for t in terms:
-                                if result.endswith(t):
-                                    return result
-        def readline(self, remove_term=True, timeout=None, skip_empty=True, error_on_timeout=True):
-            """
-            Read a single line from the device.
-            
-            Args:
-                remove_term (bool): If ``True``, remove terminal characters from the result.
-                timeout: Operation timeout. If ``None``, use the default device timeout.
-                skip_empty (bool): If ``True``, ignore empty lines (works only for ``remove_term==True``).
-                error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
-            """
-            while True:
-                result=self._read_terms(self.term_read or [],timeout=timeout,error_on_timeout=error_on_timeout)
-                self.cooldown()
-                if remove_term and self.term_read:
-                    result=remove_longest_term(result,self.term_read)
-                if not (skip_empty and remove_term and (not result)):
-                    break
-            return self._to_datatype(result)
-        def read(self, size=None, error_on_timeout=True):
-            """
-            Read data from the device.
-            
-            If `size` is not None, read `size` bytes (usual timeout applies); otherwise, read all available data (return immediately).
-            """
-            with self.single_op():
-                if size is None:
-                    result=self._read_terms(timeout=0,error_on_timeout=error_on_timeout)
-                else:
-                    result=self.instr.read(size=size)
-                    if len(result)!=size:
-                        raise self.Error(4)
-                self.cooldown()
-                return self._to_datatype(result)
-        def read_multichar_term(self, term, remove_term=True, timeout=None, error_on_timeout=True):
-            """
-            Read a single line with multiple possible terminators.
-            
-            Args:
-                term: Either a string (single multi-char terminator) or a list of strings (multiple terminators).
-                remove_term (bool): If ``True``, remove terminal characters from the result.
-                timeout: Operation timeout. If ``None``, use the default device timeout.
-                error_on_timeout (bool): If ``False``, return an incomplete line instead of raising the error on timeout.
-            """
-            if isinstance(term,anystring):
-                term=[term]
-            result=self._read_terms(term,timeout=timeout,error_on_timeout=error_on_timeout)
-            self.cooldown()
-            if remove_term and term:
-                result=remove_longest_term(result,term)
-            return self._to_datatype(result)
+        def _timeout_error(self):
+            return self.Error(4)
+        def _read_size_error(self, size, read_size):
+            return self.Error(4)
         def write(self, data, flush=True, read_echo=False, read_echo_delay=0, read_echo_lines=1):
             """
             Write data to the device.
@@ -956,6 +1053,16 @@ class NetworkDeviceBackend(IDeviceBackend):
                 if error_on_timeout:
                     raise
         return self._to_datatype(data)
+    def read_into(self, buf):
+        """
+        Read data from the device into a writable buffer `buf` (e.g., ``bytearray`` or a contiguous numpy array).
+
+        Read as many bytes as `buf` holds (usual timeout applies), and return the number of bytes read.
+        The data is received directly into `buf`.
+        """
+        size=self.socket.recv_fixedlen_into(buf)
+        self.cooldown()
+        return size
     def read_multichar_term(self, term, remove_term=True, timeout=None, error_on_timeout=True):
         """
         Read a single line with multiple possible terminators.
@@ -1253,6 +1360,7 @@ class IBackendWrapper(interface.IDevice):
         return self.instr.open()
     def close(self):
         """Close the backend."""
+        self._close_info_pool()
         return self.instr.close()
     def is_opened(self):
         """Check if the device is connected"""
@@ -138,7 +138,8 @@ class DataFormat(object):
         if self.is_ascii():
             return np.array([float(e.strip()) for e in re.split(r"\s*,\s*|\s+",data) if e!=""])
         else:
-            return np.fromstring(data,dtype=self.to_desc("numpy"))
+            data=np.frombuffer(data,dtype=self.to_desc("numpy"))
+            return data if data.flags.writeable else data.copy()
     def convert_to_str(self, data, ascii_format=".5f"):
         """
         Convert the array into a string data.
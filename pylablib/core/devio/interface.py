@@ -1,6 +1,10 @@
 ### Interface for a generic device class ###
 
 from ..utils import functions
+
+import time
+import copy
+import multiprocessing.pool
  
 _info_node_kinds=["settings","status","full_info"]
 
@@ -9,12 +13,21 @@ class IDevice(object):
     A base class for an instrument.
      
     Contains some useful functions for dealing with device settings.
+
+    Info node values can be cached for a given time (see `ttl` argument of :meth:`_add_info_node` and :meth:`set_info_nodes_ttl`),
+    and acquired concurrently in several threads (see :meth:`set_info_threads`).
     """
+    _default_info_threads=1 # number of threads used to acquire info nodes; should only be increased if the getters can be safely called concurrently
     def __init__(self):
         object.__init__(self)
         self._nodes_ignore_error={"get":(),"set":()}
         self._info_nodes=dict([(ik,{}) for ik in _info_node_kinds])
         self._info_nodes_order=dict([(ik,[]) for ik in _info_node_kinds])
+        self._info_nodes_ttl={}
+        self._info_cache={}
+        self._info_nodes_timing={}
+        self._info_threads=self._default_info_threads
+        self._info_pool=None
         self._add_full_info_node("cls",lambda: self.__class__.__name__)
          
     def open(self):
@@ -22,7 +35,7 @@ class IDevice(object):
         pass
     def close(self):
         """Close the connection"""
-        pass
+        self._close_info_pool()
     def is_opened(self):
         """Check if the device is connected"""
         return True
@@ -32,6 +45,7 @@ class IDevice(object):
         return self
     def __exit__(self, *args, **vargs):
         self.close()
+        self._close_info_pool()
         return False
      
     @staticmethod
@@ -47,7 +61,7 @@ class IDevice(object):
             else:
                 return [func(ch) for ch in choices]
         return func_mux
-    def _add_info_node(self, path, kind, getter=None, setter=None, ignore_error=(), mux=None, multiarg=True):
+    def _add_info_node(self, path, kind, getter=None, setter=None, ignore_error=(), mux=None, multiarg=True, ttl=None):
         """
         Adds an info parameter.
          
@@ -60,6 +74,7 @@ class IDevice(object):
             mux(tuple): 1- or 2-tuple with parameters for function multiplexing (calling several times and combining result in a list).
                 The first element is an iterable of argument values to be iterated over, the second argument is the position where this argument is inserted (by default, 0)
             multiarg(bool): if ``True`` and the setter argument is a tuple, interpret it as a tuple of arguments and expand it; otherwise, keep it as a single tuple argument.
+            ttl(float): if not ``None``, the value returned by the getter is cached for `ttl` seconds (the cache is cleared when the setter is called).
         """
         if kind not in self._info_nodes:
             raise ValueError("unrecognized info node kind: {}".format(kind))
@@ -73,12 +88,89 @@ class IDevice(object):
             setter=self._multiplex_func(setter,*mux[:2],multiarg=multiarg) if setter else None
         self._info_nodes[kind][path]=(getter,setter,ignore_error)
         self._info_nodes_order[kind].append(path)
-    def _add_full_info_node(self, path, getter=None, ignore_error=(), mux=None):
-        return self._add_info_node(path,"full_info",getter=getter,ignore_error=ignore_error,mux=mux)
-    def _add_status_node(self, path, getter=None, ignore_error=(), mux=None):
-        return self._add_info_node(path,"status",getter=getter,ignore_error=ignore_error,mux=mux)
-    def _add_settings_node(self, path, getter=None, setter=None, ignore_error=(), mux=None):
-        return self._add_info_node(path,"settings",getter=getter,setter=setter,ignore_error=ignore_error,mux=mux)
+        if ttl is not None:
+            self._info_nodes_ttl[path]=ttl
+    def _add_full_info_node(self, path, getter=None, ignore_error=(), mux=None, ttl=None):
+        return self._add_info_node(path,"full_info",getter=getter,ignore_error=ignore_error,mux=mux,ttl=ttl)
+    def _add_status_node(self, path, getter=None, ignore_error=(), mux=None, ttl=None):
+        return self._add_info_node(path,"status",getter=getter,ignore_error=ignore_error,mux=mux,ttl=ttl)
+    def _add_settings_node(self, path, getter=None, setter=None, ignore_error=(), mux=None, ttl=None):
+        return self._add_info_node(path,"settings",getter=getter,setter=setter,ignore_error=ignore_error,mux=mux,ttl=ttl)
+
+    def set_info_nodes_ttl(self, ttl, nodes=None):
+        """
+        Set caching time (in seconds) for the info nodes.
+
+        `nodes` specifies the list of nodes (by default, all nodes). If ``ttl is None``, disable caching.
+        """
+        if nodes is None:
+            nodes=[k for kind in _info_node_kinds for k in self._info_nodes_order[kind]]
+        for k in nodes:
+            if ttl is None:
+                self._info_nodes_ttl.pop(k,None)
+            else:
+                self._info_nodes_ttl[k]=ttl
+        self.clear_info_cache(nodes)
+    def clear_info_cache(self, nodes=None):
+        """
+        Clear the cached info nodes values.
+
+        `nodes` specifies the list of nodes (by default, all nodes).
+        """
+        if nodes is None:
+            self._info_cache.clear()
+        else:
+            for k in nodes:
+                self._info_cache.pop(k,None)
+    def set_info_threads(self, threads=1):
+        """
+        Set the number of threads used to acquire info nodes in :meth:`get_settings`, :meth:`get_full_status` and :meth:`get_full_info`.
+
+        Should only be increased if the getters can be safely called concurrently (e.g., they don't use the same communication channel).
+        The thread pool is kept between the calls, and is closed on :meth:`close`.
+        """
+        threads=max(threads,1)
+        if threads!=self._info_threads:
+            self._close_info_pool()
+        self._info_threads=threads
+        self._get_info_pool()
+    def _get_info_pool(self):
+        """Get the thread pool used to acquire info nodes (created on the first call), or ``None`` if only a single thread is used"""
+        if self._info_threads>1 and self._info_pool is None:
+            self._info_pool=multiprocessing.pool.ThreadPool(self._info_threads)
+        return self._info_pool
+    def _close_info_pool(self):
+        """Close the info nodes thread pool (it is recreated on the next use)"""
+        pool=getattr(self,"_info_pool",None)
+        if pool is not None:
+            self._info_pool=None
+            pool.terminate()
+    def get_info_nodes_timing(self):
+        """Get dict ``{name: time}`` with the time (in seconds) taken by the last call of the info nodes getters."""
+        return self._info_nodes_timing.copy()
+    def _call_info_getter(self, path, getter, ignore_error=()):
+        """
+        Call the info node getter, or get its cached value.
+
+        Return tuple ``(ok, value)``, where ``ok`` is ``False`` if one of `ignore_error` exceptions has been raised.
+        For cached nodes the returned value is a copy, so it can be safely modified by the caller.
+        """
+        ttl=self._info_nodes_ttl.get(path)
+        if ttl is not None:
+            cached=self._info_cache.get(path)
+            if cached is not None and time.time()<cached[0]+ttl:
+                return True,copy.deepcopy(cached[1])
+        t0=time.time()
+        try:
+            value=getter()
+        except ignore_error:
+            return False,None
+        finally:
+            self._info_nodes_timing[path]=time.time()-t0
+        if ttl is not None:
+            self._info_cache[path]=(t0,value)
+            value=copy.deepcopy(value)
+        return True,value
     def _get_info(self, kinds, nodes=None):
         """
         Get dict ``{name: value}`` containing all the device settings.
@@ -89,16 +181,22 @@ class IDevice(object):
         for kind in kinds:
             if kind not in self._info_nodes:
                 raise ValueError("unrecognized info node kind: {}".format(kind))
-        info={}
+        getters=[]
         for kind in kinds:
             for k in self._info_nodes_order[kind]:
                 if (nodes is None or k in nodes):
                     g,_,err=self._info_nodes[kind][k]
                     if g:
-                        try:
-                            info[k]=g()
-                        except err+self._nodes_ignore_error["get"]:
-                            pass
+                        getters.append((k,g,err+self._nodes_ignore_error["get"]))
+        pool=self._get_info_pool() if len(getters)>1 else None
+        if pool is not None:
+            values=pool.map(lambda args: self._call_info_getter(*args),getters)
+        else:
+            values=[self._call_info_getter(*args) for args in getters]
+        info={}
+        for (k,_,_),(ok,v) in zip(getters,values):
+            if ok:
+                info[k]=v
         return info
     def get_settings(self, nodes=None):
         """
@@ -131,6 +229,7 @@ class IDevice(object):
         for k in self._info_nodes_order["settings"]:
             _,s,err=self._info_nodes["settings"][k]
             if s and (k in settings):
+                self._info_cache.pop(k,None)
                 try:
                     s(settings[k])
                 except err+self._nodes_ignore_error["set"]:
@@ -141,7 +240,7 @@ class IDevice(object):
             if key in self._info_nodes[kind]:
                 g=self._info_nodes[kind][key][0]
                 if g:
-                    return g()
+                    return self._call_info_getter(key,g)[1]
                 raise ValueError("no getter for value '{}'".format(key))
         raise KeyError("no property '{}'".format(key))
     def __setitem__(self, key, value):
@@ -149,6 +248,7 @@ class IDevice(object):
         if key in self._info_nodes["settings"]:
             s=self._info_nodes["settings"][key][1]
             if s:
+                self._info_cache.pop(key,None)
                 return s(value)
             raise ValueError("no setter for value '{}'".format(key))
         raise KeyError("no property '{}'".format(key))
\ No newline at end of file
@@ -1,5 +1,5 @@
 from . import loadfile
-from .loadfile import load
+from .loadfile import load, iter_load
 
 from . import savefile
 from .savefile import save
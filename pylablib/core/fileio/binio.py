@@ -44,9 +44,9 @@ def write_num(x, f, dtype):
     if dtype[0] not in "<>":
         dtype=default_byteorder+dtype
     if dtype in idtypes_inv:
-        np.asarray(int(x)).astype(dtype).tofile(f)
+        f.write(np.asarray(int(x)).astype(dtype).tobytes())
     elif dtype in fdtypes_inv:
-        np.asarray(float(x)).astype(dtype).tofile(f)
+        f.write(np.asarray(float(x)).astype(dtype).tobytes())
     else:
         raise ValueError("unrecognized dtype: {}".format(dtype))
 def write_str(s, f, dtype, strict=False):
@@ -65,4 +65,10 @@ class InsufficientBinaryFileDescription(Error):
     def __init__(self):
         pass
     def __str__(self):
-        return "insufficient binary file description"
\ No newline at end of file
+        return "insufficient binary file description"
+
+class FastReadError(Error):
+    """
+    Error raised when the data can't be read by the fast (vectorized) table reader.
+    """
+    pass
@@ -248,7 +248,7 @@ class CSVTableInputFileFormat(ITextInputFileFormat):
     def __init__(self):
         ITextInputFileFormat.__init__(self)
     @staticmethod
-    def read_file(location_file, out_type="table", dtype="numeric", columns=None, delimiters=None, empty_entry_substitute=None, ignore_corrupted_lines=True, skip_lines=0, **kwargs):
+    def read_file(location_file, out_type="table", dtype="numeric", columns=None, delimiters=None, empty_entry_substitute=None, ignore_corrupted_lines=True, skip_lines=0, engine="auto", **kwargs):
         """
         Read CSV file.
         
@@ -268,6 +268,8 @@ class CSVTableInputFileFormat(ITextInputFileFormat):
             ignore_corrupted_lines (bool): If ``True``, skip corrupted (e.g., non-numeric for numeric dtype, or with too few entries) lines;
                 otherwise, raise :exc:`ValueError`.
             skip_lines (int): Number of lines to skip from the beginning of the file.
+            engine (str): Reading engine. Can be ``'generic'`` (line-by-line parser), ``'fast'`` (vectorized reader for purely numeric files),
+                or ``'auto'`` (try the fast reader first, and fall back to the generic one if it fails).
         """
         if delimiters is None:
             delimiters=parse_csv._table_delimiters
@@ -275,7 +277,7 @@ class CSVTableInputFileFormat(ITextInputFileFormat):
         for _ in range(skip_lines):
             location_file.stream.readline()
         data,comments,corrupted=parse_csv.load_table(location_file.stream,dtype=dtype,columns=columns,
-                        delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,ignore_corrupted_lines=ignore_corrupted_lines)
+                        delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,ignore_corrupted_lines=ignore_corrupted_lines,engine=engine)
         location_file.close()
         if out_type=="table" and not funcargparse.is_sequence(columns,"builtin;nostring") and len(data)>0:
             columns,comment_idx=_find_columns_lines(corrupted,comments,data.shape[1])
@@ -285,6 +287,36 @@ class CSVTableInputFileFormat(ITextInputFileFormat):
                 data.set_column_names(columns)
         creation_time=_extract_savetime_comment(comments)
         return datafile.DataFile(data=data,comments=comments,creation_time=creation_time,filetype="csv")
+    @staticmethod
+    def iter_file(location_file, chunk_size=10000, out_type="table", dtype="numeric", columns=None, delimiters=None, empty_entry_substitute=None, ignore_corrupted_lines=True, skip_lines=0, engine="auto", **kwargs):
+        """
+        Iterate over CSV file chunks.
+        
+        Yield tables (:class:`.DataTable` or numpy arrays, depending on `out_type`) with `chunk_size` rows each (the last chunk can be shorter).
+        Column names and dtypes are determined from the first chunk, and are the same for all the following chunks.
+        See :func:`.parse_csv.iter_table` for more description.
+        
+        The rest of the arguments are the same as in :meth:`read_file`.
+        """
+        if delimiters is None:
+            delimiters=parse_csv._table_delimiters
+        location_file.open(mode="read",data_type="text")
+        try:
+            for _ in range(skip_lines):
+                location_file.stream.readline()
+            chunks=parse_csv.iter_table(location_file.stream,dtype=dtype,columns=columns,out_type=out_type,chunk_size=chunk_size,
+                            delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,ignore_corrupted_lines=ignore_corrupted_lines,engine=engine)
+            column_names=columns if funcargparse.is_sequence(columns,"builtin;nostring") else None
+            first_chunk=True
+            for data,comments,corrupted in chunks:
+                if first_chunk and out_type=="table" and column_names is None:
+                    column_names,_=_find_columns_lines(corrupted,comments,data.shape[1])
+                first_chunk=False
+                if out_type=="table" and column_names is not None:
+                    data.set_column_names(column_names)
+                yield data
+        finally:
+            location_file.close()
     
 class DictionaryInputFileFormat(ITextInputFileFormat):
     """
@@ -343,7 +375,7 @@ class BinaryTableInputFileFormatter(IInputFileFormat):
         IInputFileFormat.__init__(self)
     
     @staticmethod
-    def read_file(location_file, out_type="table", dtype=">f8", columns=None, packing="flatten", preamble=None, skip_bytes=0, **kwargs):
+    def read_file(location_file, out_type="table", dtype=">f8", columns=None, packing="flatten", preamble=None, skip_bytes=0, memmap=False, **kwargs):
         
         """
         Read binary file.
@@ -359,16 +391,29 @@ class BinaryTableInputFileFormatter(IInputFileFormat):
             preamble (dict): If not ``None``, defines binary file parameters that supersede the parameteres supplied to the function.
                 The defined parameters are ``'dtype'``, ``'packing'``, ``'ncols'`` (number of columns) and ``'nrows'`` (number of rows).
             skip_bytes (int): Number of bytes to skip from the beginning of the file.
+            memmap: If ``False``, read the whole file into memory.
+                Otherwise, return the data backed by a :class:`numpy.memmap` object, so that the data is only read from the disk when accessed;
+                can be ``True`` or ``'r'`` (read-only access), or ``'c'`` (copy-on-write: assignments affect data in memory, but changes are not saved to disk).
         """
+        funcargparse.check_parameter_range(memmap,"memmap",{False,True,"r","c"})
         preamble=preamble or {}
         dtype=preamble.get("dtype",dtype)
         packing=preamble.get("packing",packing)
         preamble_columns_num=preamble.get("ncols",None)
         preamble_rows_num=preamble.get("nrows",None)
         location_file.open(mode="read",data_type="binary")
-        if skip_bytes:
-            location_file.stream.seek(skip_bytes,1)
-        data=np.fromfile(location_file.stream,dtype=dtype)
+        if memmap:
+            dtype=np.dtype(dtype)
+            location_file.stream.seek(0,2)
+            length=(location_file.stream.tell()-skip_bytes)//dtype.itemsize
+            if length>0:
+                data=np.memmap(location_file.stream,dtype=dtype,mode="r" if memmap is True else memmap,offset=skip_bytes,shape=(length,))
+            else:
+                data=np.zeros(0,dtype=dtype)
+        else:
+            if skip_bytes:
+                location_file.stream.seek(skip_bytes,1)
+            data=np.fromfile(location_file.stream,dtype=dtype)
         location_file.close()
         try:
             columns_num=len(columns)
@@ -381,22 +426,46 @@ class BinaryTableInputFileFormatter(IInputFileFormat):
             raise ValueError("supplied columns number {0} disagrees with extracted form preamble {1}".format(columns_num,preamble_columns_num))
         if columns_num is not None:
             if packing=="flatten":
+                if preamble_rows_num is not None: # ignore extra data (e.g., if the file is currently being appended)
+                    data=data[:preamble_rows_num*columns_num]
                 data=data.reshape((-1,columns_num))
             elif packing=="transposed":
-                data=data.reshape((columns_num,-1)).transposed()
+                data=data.reshape((columns_num,-1)).transpose()
             else:
                 raise ValueError("unrecognized packing method: {0}".format(packing))
         else:
-            data=np.column_stack([data])
+            data=data.reshape((-1,1))
         if preamble_rows_num is not None and len(data)!=preamble_rows_num:
             raise ValueError("supplied rows number {0} disagrees with extracted form preamble {1}".format(len(data),preamble_rows_num))
         #data=table_to_datatype(data,columns=columns,out_type=out_type)
-        data=parse_csv.columns_to_table([data[:,i] for i in range(data.shape[1])],columns=columns,out_type=out_type)
+        if not (memmap and out_type=="array"): # memmap-backed array is returned as is
+            data=parse_csv.columns_to_table([data[:,i] for i in range(data.shape[1])],columns=columns,out_type=out_type,force_copy=not memmap)
         return datafile.DataFile(data=data,filetype="bin")
         
         
 
 
+def iter_load(path=None, chunk_size=10000, input_format="csv", loc="file", **kwargs):
+    """
+    Load data from the file in chunks.
+    
+    Yield tables with `chunk_size` rows each (the last chunk can be shorter); column names and dtypes are the same for all chunks.
+    Only a single chunk is kept in memory at a time, so it can be used to process files which are larger than the available memory.
+    
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Number of rows in a single chunk.
+        input_format (str): Input file format. Currently only ``'csv'`` is supported.
+        loc (str): Location type.
+    
+    `**kwargs` are passed to the file formatter used to read the data (see :meth:`CSVTableInputFileFormat.iter_file` for the possible arguments).
+    """
+    funcargparse.check_parameter_range(input_format,"input_format",{"csv"})
+    loc=location.get_location(loc,path)
+    location_file=location.LocationFile(loc)
+    return CSVTableInputFileFormat.iter_file(location_file,chunk_size=chunk_size,**kwargs)
+
+
 def load(path=None, input_format=None, loc="file", return_file=False, **kwargs):
     """
     Load data from the file.
@@ -147,7 +147,7 @@ class LocationFile(object):
         Open the file.
         
         Args:
-            mode (str): Opening mode. Can be ``'read'``, ``'write'`` or ``'append'``.
+            mode (str): Opening mode. Can be ``'read'``, ``'write'``, ``'append'`` or ``'update'`` (read and write an existing file).
             data_type (str): Either ``'text'`` or ``'binary'``.
         """
         if self.opened:
@@ -201,7 +201,7 @@ class IDataLocation(object):
         Open a location file.
         
         Args:
-            mode (str): Opening mode. Can be ``'read'``, ``'write'`` or ``'append'``.
+            mode (str): Opening mode. Can be ``'read'``, ``'write'``, ``'append'`` or ``'update'`` (read and write an existing file).
             name: File name inside the location.
             data_type (str): Either ``'text'`` or ``'binary'``.
         """
@@ -269,6 +269,8 @@ class IFileSystemDataLocation(IDataLocation):
         elif mode=="append":
             s=self._open_file_stream("a",name,data_type)
             s.seek(0,2)
+        elif mode=="update":
+            s=self._open_file_stream("r+",name,data_type)
         else:
             raise ValueError("unrecognized open mode: {0}".format(mode))
         return s
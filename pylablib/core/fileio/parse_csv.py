@@ -5,10 +5,12 @@ Utilities for parsing CSV files.
 from builtins import range, zip
 from ..utils.py3 import textstring
 
+from . import errors
 from ..utils import string, funcargparse  #@UnresolvedImport
 from ..datatable import table as datatable  #@UnresolvedImport
 
 import re
+import warnings
 import numpy as np
 
 _depends_local=["..utils.string"]
@@ -141,6 +143,27 @@ def _try_convert_column(column, dtype, min_dtype="int"):
     else:
         return np.array(column).astype(dtype), dtype # dtype is specified, just convert
 
+def _join_columns(columns, new_columns):
+    """
+    Join two lists of columns (lists or numpy arrays).
+    """
+    if new_columns==[]:
+        return columns
+    if columns==[]:
+        return new_columns
+    joined_columns=[]
+    for c,ac in zip(columns,new_columns):
+        if isinstance(c,np.ndarray) and isinstance(ac,np.ndarray):
+            nc=np.concatenate((c,ac))
+        elif isinstance(ac,np.ndarray):
+            nc=c+list(ac)
+        elif isinstance(c,np.ndarray):
+            nc=list(c)+ac
+        else:
+            nc=c+ac
+        joined_columns.append(nc)
+    return joined_columns
+
 class ChunksAccumulator(object):
     """
     Class for accumulating data chunks into a single array.
@@ -179,23 +202,7 @@ class ChunksAccumulator(object):
         """
         Append columns (lists or numpy arrays) to the existing data.
         """
-        if columns==[]:
-            return
-        if self.columns==[]:
-            self.columns=columns
-        else:
-            new_columns=[]
-            for c,ac in zip(self.columns,columns):
-                if isinstance(c,np.ndarray) and isinstance(ac,np.ndarray):
-                    nc=np.concatenate((c,ac))
-                elif isinstance(ac,np.ndarray):
-                    nc=c+list(ac)
-                elif isinstance(c,np.ndarray):
-                    nc=list(c)+ac
-                else:
-                    nc=c+ac
-                new_columns.append(nc)
-            self.columns=new_columns
+        self.columns=_join_columns(self.columns,columns)
     def add_chunk(self, chunk):
         """
         Add a chunk (2D list) to the pre-existing data.
@@ -241,8 +248,183 @@ class ChunksAccumulator(object):
         self.add_columns(columns)
 
 
+##### Fast (vectorized) numeric table reading #####
+
+_fast_dtypes={"numeric","int","float"}
+_fast_block_size=2**22 # number of characters read in a single block
+def _chars_table(chars):
+    table=np.zeros(256,dtype="bool")
+    table[[ord(c) for c in chars]]=True
+    return table
+_fast_delimiter_chars=_chars_table(" \t\v\f\r,")
+_fast_numeric_chars=_chars_table("-+.0123456789eEnNaAiIfFtTyY")
+_fast_float_chars=_chars_table(".eEnNiI")
+_fast_max_int=2**53 # maximal integer which is exactly representable by a float
+def _can_read_fast(f, dtype, delimiters, empty_entry_substitute, stop_comment):
+    if empty_entry_substitute is not None or stop_comment is not None:
+        return False
+    if delimiters not in [_table_delimiters,_table_delimiters_regexp]:
+        return False
+    dtypes=dtype if funcargparse.is_sequence(dtype,"builtin;nostring") else [dtype]
+    if not all(dt in _fast_dtypes for dt in dtypes):
+        return False
+    try:
+        f.tell()
+    except (AttributeError, IOError, ValueError):
+        return False
+    return True
+def _parse_block_fast(block, ncols=None):
+    """
+    Parse a text block containing numeric table data.
+    
+    Return tuple ``(data, float_columns, comments, bad_rows)``, where `data` is a 2D float array,
+    `float_columns` is a boolean mask of columns containing non-integer entries,
+    `comments` is a list of comment strings and `bad_rows` is a list of non-numeric rows (already split into entries).
+    Raise :exc:`.errors.FastReadError` if the block can't be parsed in the fast mode.
+    """
+    chars=np.frombuffer(block.encode("utf-8"),dtype="u1")
+    newlines=(chars==ord("\n"))
+    delimiters=_fast_delimiter_chars[chars]
+    line_idx=np.cumsum(newlines)-newlines
+    # lines with non-numeric characters (comments, column names, corrupted rows) are dealt with separately
+    nonnumeric_lines=np.unique(line_idx[~(_fast_numeric_chars[chars]|delimiters|newlines)])
+    comments=[]
+    bad_rows=[]
+    if len(nonnumeric_lines):
+        line_starts=np.concatenate(([0],np.flatnonzero(newlines)+1))
+        line_ends=np.append(np.flatnonzero(newlines),len(chars))
+        for l in nonnumeric_lines:
+            line=chars[line_starts[l]:line_ends[l]].tobytes().decode("utf-8").strip()
+            if line[:1]=="#":
+                comments.append(line.lstrip("# \t"))
+            else:
+                row=[e for e in _table_delimiters_regexp.split(line) if e]
+                try:
+                    _try_convert_row(row,"numeric")
+                except ValueError:
+                    # the generic parser trims the rows to the number of columns, so a row with a numeric beginning might still be valid
+                    prefix=row[:ncols or 1]
+                    try:
+                        _try_convert_row(prefix,"numeric")
+                    except ValueError:
+                        bad_rows.append(row)
+                        continue
+                raise errors.FastReadError("row {} requires the generic parser".format(row))
+        line_mask=np.ones(line_idx[-1]+1,dtype="bool")
+        line_mask[nonnumeric_lines]=False
+        keep=line_mask[line_idx]
+        chars,newlines,delimiters,line_idx=chars[keep],newlines[keep],delimiters[keep],line_idx[keep]
+    tokens=~(newlines|delimiters)
+    token_starts=tokens.copy()
+    token_starts[1:]&=~tokens[:-1]
+    row_sizes=np.bincount(line_idx[token_starts],minlength=line_idx[-1]+1 if len(line_idx) else 0)
+    row_sizes=row_sizes[row_sizes>0]
+    if not len(row_sizes):
+        return None,None,comments,bad_rows
+    if ncols is None:
+        ncols=row_sizes[0]
+    if np.any(row_sizes!=ncols):
+        raise errors.FastReadError("rows have different lengths")
+    nrows=len(row_sizes)
+    text=np.where(delimiters,np.uint8(ord(" ")),chars).tobytes().decode("ascii")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            data=np.fromstring(text,dtype="float",sep=" ")
+        except (ValueError, DeprecationWarning):
+            raise errors.FastReadError("can't parse numerical data")
+    if len(data)!=nrows*ncols:
+        raise errors.FastReadError("can't parse numerical data")
+    float_tokens=(np.cumsum(token_starts)-1)[_fast_float_chars[chars]]
+    float_columns=np.bincount(float_tokens%ncols,minlength=ncols)>0
+    return data.reshape((nrows,ncols)),float_columns,comments,bad_rows
+def load_columns_fast(f, dtype="numeric", ignore_corrupted_lines=True, block_size=None):
+    """
+    Load numeric columns from the file stream `f` using the fast vectorized reader.
+    
+    The file is read in large blocks, and the data is converted into numpy arrays without creating intermediate Python objects.
+    Only works for numeric data (integer or floating point) separated by commas or whitespaces.
+    Raise :exc:`.errors.FastReadError` if the data can't be processed by the fast reader
+    (e.g., it contains complex numbers or escaped strings, or the rows have different lengths);
+    in this case the stream position is undefined.
+    
+    Args:
+        dtype: dtype of entries; can be either a single type, or a list of types (one per column).
+            Possible dtypes are ``'int'``, ``'float'`` and ``'numeric'`` (coerce to minimal possible numeric type).
+        ignore_corrupted_lines: If ``True``, skip corrupted (e.g., non-numeric, or with too few entries) lines;
+            otherwise, raise :exc:`ValueError`.
+        block_size (int): Number of characters to read in a single block (by default, 4M).
+    
+    Returns:
+        tuple: ``(columns, comments, corrupted_lines)``, same as :func:`load_columns`.
+    """
+    block_size=block_size or _fast_block_size
+    row_size=len(dtype) if funcargparse.is_sequence(dtype,"builtin;nostring") else None
+    ncols=None
+    chunks=[]
+    comments=[]
+    float_columns=None
+    bad_rows=[]
+    while True:
+        block=f.read(block_size)
+        if not block:
+            break
+        if not block.endswith("\n"):
+            block=block+f.readline()
+        data,block_float_columns,block_comments,block_bad_rows=_parse_block_fast(block,ncols)
+        comments+=block_comments
+        bad_rows+=block_bad_rows
+        if data is not None:
+            ncols=data.shape[1]
+            float_columns=block_float_columns if float_columns is None else (float_columns|block_float_columns)
+            chunks.append(data)
+    if ncols is None:
+        if bad_rows:
+            raise errors.FastReadError("no numeric rows found")
+        return [],comments,{"size":[],"type":[]}
+    if row_size is None:
+        row_size=ncols
+    data=np.concatenate(chunks) if len(chunks)>1 else chunks[0]
+    columns=_convert_columns_fast(data,dtype,float_columns,row_size)
+    corrupted_lines=_sort_corrupted_rows_fast(bad_rows,row_size,ignore_corrupted_lines)
+    return columns,comments,corrupted_lines
+def _convert_columns_fast(data, dtype, float_columns, row_size):
+    """
+    Convert 2D float array returned by the fast reader into the list of columns with the given dtype.
+    """
+    if data.shape[1]<row_size:
+        raise errors.FastReadError("rows are shorter than the number of columns")
+    dtype=funcargparse.as_sequence(dtype,row_size,allowed_type="builtin;nostring")
+    columns=[]
+    for i,dt in enumerate(dtype):
+        c=data[:,i]
+        if dt=="float" or (dt=="numeric" and float_columns[i]):
+            columns.append(c.copy())
+        else:
+            if float_columns[i]:
+                raise errors.FastReadError("column {} has non-integer entries".format(i))
+            if np.any(np.abs(c)>=_fast_max_int):
+                raise errors.FastReadError("column {} has too large integer entries".format(i))
+            columns.append(c.astype("int"))
+    return columns
+def _sort_corrupted_rows_fast(bad_rows, row_size, ignore_corrupted_lines):
+    """
+    Sort non-numeric rows returned by the fast reader into a corrupted lines dictionary (same as in :class:`ChunksAccumulator`).
+    """
+    corrupted_lines={"size":[],"type":[]}
+    for row in bad_rows:
+        if len(row)>=row_size:
+            corrupted_lines["type"].append(row[:row_size])
+        elif ignore_corrupted_lines:
+            corrupted_lines["size"].append(row)
+        else:
+            raise ValueError("size of the row doesn't agree with the number of columns")
+    return corrupted_lines
+
+
 _complex_dtypes={"generic","raw"} # dtypes for which simple_entries==False (they can potentially be strings or lists, so that splitting lines is more complicated)
-def load_columns(f, dtype, delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None):
+_engines={"auto","fast","generic"}
+def load_columns(f, dtype, delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None, engine="auto"):
     """
     Load columns from the file stream `f`.
     
@@ -257,6 +439,9 @@ def load_columns(f, dtype, delimiters=_table_delimiters, empty_entry_substitute=
             otherwise, raise :exc:`ValueError`.
         stop_comment (str): Regex string for the stopping comment.
             If not ``None``. the function will stop if comment satisfying `stop_comment` regex is encountered.
+        engine (str): Reading engine. Can be ``'generic'`` (line-by-line parser, which handles arbitrary entries),
+            ``'fast'`` (vectorized reader for purely numeric files, see :func:`load_columns_fast`; raise :exc:`.errors.FastReadError` if it's not applicable),
+            or ``'auto'`` (try the fast reader first, and fall back to the generic one if it fails).
             
     Returns:
         tuple: ``(columns, comments, corrupted_lines)``.
@@ -268,6 +453,16 @@ def load_columns(f, dtype, delimiters=_table_delimiters, empty_entry_substitute=
             `corrupted_lines` is a dict ``{'size':list, 'type':list}`` of corrupted lines (already split into entries),
             based on the corruption type (``'size'`` means too small size, ``'type'`` means it couldn't be converted using provided dtype).
     """
+    funcargparse.check_parameter_range(engine,"engine",_engines)
+    if engine=="fast" or (engine=="auto" and _can_read_fast(f,dtype,delimiters,empty_entry_substitute,stop_comment)):
+        if engine=="auto":
+            start=f.tell()
+        try:
+            return load_columns_fast(f,dtype,ignore_corrupted_lines=ignore_corrupted_lines)
+        except errors.FastReadError:
+            if engine=="fast":
+                raise
+            f.seek(start)
     original_chunk_size=1000
     chunk_multiplier=1.5
     chunk_size=original_chunk_size
@@ -292,13 +487,102 @@ def load_columns(f, dtype, delimiters=_table_delimiters, empty_entry_substitute=
     return accum.columns,comments,accum.corrupted_lines
 
 
-def columns_to_table(data, columns=None, out_type="table"):
+def _fixed_chunk_dtype(dtype, min_dtype):
+    """
+    Get dtype used for reading the following chunks given the minimal dtype of the first chunk.
+    """
+    return [mdt if dt=="numeric" and mdt in {"int","float","complex"} else dt for dt,mdt in zip(dtype,min_dtype)]
+def _iter_raw_columns_generic(f, dtype, lines_per_read, delimiters, empty_entry_substitute, ignore_corrupted_lines, stop_comment):
+    generic_dtype=any(dt in _complex_dtypes for dt in funcargparse.as_sequence(dtype,allowed_type="builtin;nostring"))
+    finished=False
+    while not finished:
+        chunk,comments,finished=read_table_and_comments(f,
+                        delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,stop_comment=stop_comment,chunk_size=lines_per_read,simple_entries=not generic_dtype)
+        accum=ChunksAccumulator(dtype,ignore_corrupted_lines=ignore_corrupted_lines)
+        accum.add_chunk(chunk)
+        if accum.columns:
+            dtype=_fixed_chunk_dtype(accum.dtype,accum.min_dtype)
+        yield accum.columns,comments,accum.corrupted_lines,dtype
+def _iter_raw_columns(f, dtype, lines_per_read, delimiters, empty_entry_substitute, ignore_corrupted_lines, stop_comment, engine):
+    """
+    Iterate over raw column chunks of variable size.
+    
+    Yield tuples ``(columns, comments, corrupted_lines, dtype)``, where `dtype` is the (fixed) dtype for the following chunks.
+    If the fast reader fails in the middle of the file, continue from the failed block using the generic reader.
+    """
+    funcargparse.check_parameter_range(engine,"engine",_engines)
+    generic_args=(delimiters,empty_entry_substitute,ignore_corrupted_lines,stop_comment)
+    if engine=="fast" or (engine=="auto" and _can_read_fast(f,dtype,delimiters,empty_entry_substitute,stop_comment)):
+        row_size=len(dtype) if funcargparse.is_sequence(dtype,"builtin;nostring") else None
+        ncols=None
+        while True:
+            start=f.tell()
+            block=f.read(_fast_block_size)
+            if not block:
+                return
+            if not block.endswith("\n"):
+                block=block+f.readline()
+            try:
+                data,float_columns,comments,bad_rows=_parse_block_fast(block,ncols)
+                if data is None:
+                    if bad_rows and row_size is None:
+                        raise errors.FastReadError("no numeric rows found")
+                    yield [],comments,_sort_corrupted_rows_fast(bad_rows,row_size or 0,ignore_corrupted_lines),dtype
+                    continue
+                ncols=data.shape[1]
+                row_size=row_size or ncols
+                columns=_convert_columns_fast(data,dtype,float_columns,row_size)
+                corrupted_lines=_sort_corrupted_rows_fast(bad_rows,row_size,ignore_corrupted_lines)
+            except errors.FastReadError:
+                if engine=="fast":
+                    raise
+                f.seek(start)
+                break
+            dtype=[("float" if c.dtype.kind=="f" else "int") for c in columns]
+            yield columns,comments,corrupted_lines,dtype
+    for raw_chunk in _iter_raw_columns_generic(f,dtype,lines_per_read,*generic_args):
+        yield raw_chunk
+def iter_columns(f, dtype="numeric", chunk_size=10000, delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None, engine="auto"):
+    """
+    Iterate over columns chunks from the file stream `f`.
+    
+    Each chunk contains `chunk_size` rows (the last chunk can be shorter), so only a single chunk is stored in memory at a time.
+    Column dtypes are determined from the first chunk and are kept the same for all the following chunks;
+    rows which can't be converted to these dtypes are treated as corrupted.
+    Hence, if the column types can change in the middle of the file (e.g., the first rows have integer values, and the following ones are floats),
+    `dtype` should be specified explicitly.
+    
+    Arguments are the same as in :func:`load_columns`.
+    
+    Yields:
+        tuple: ``(columns, comments, corrupted_lines)``, where `comments` and `corrupted_lines` are the ones encountered since the previous chunk
+        (see :func:`load_columns` for description).
+    """
+    columns=[]
+    comments=[]
+    corrupted_lines={"size":[],"type":[]}
+    for raw_columns,raw_comments,raw_corrupted,dtype in _iter_raw_columns(f,dtype,chunk_size,delimiters,empty_entry_substitute,ignore_corrupted_lines,stop_comment,engine):
+        columns=_join_columns(columns,raw_columns)
+        comments+=raw_comments
+        for k in corrupted_lines:
+            corrupted_lines[k]+=raw_corrupted[k]
+        while columns and len(columns[0])>=chunk_size:
+            yield [c[:chunk_size] for c in columns],comments,corrupted_lines
+            columns=[c[chunk_size:] for c in columns]
+            comments=[]
+            corrupted_lines={"size":[],"type":[]}
+    if columns and len(columns[0])>0:
+        yield columns,comments,corrupted_lines
+
+
+def columns_to_table(data, columns=None, out_type="table", force_copy=True):
     """
     Convert `data` (columns list) into a table.
     
     Args:
         columns: either number if columns, or a list of columns names.
         out_type (str): type of the result: ``'array'`` for numpy array, ``'table'`` for :class:`.DataTable` object.
+        force_copy (bool): If ``False`` and ``out_type=='table'``, the table can reference the supplied columns data instead of copying it.
     """
     funcargparse.check_parameter_range(out_type,"out_type",{"table","array"})
     if columns is not None:
@@ -312,7 +596,7 @@ def columns_to_table(data, columns=None, out_type="table"):
     if out_type=="table":
         if len(data)==0 and col_num is not None:
             data=[np.zeros(0,) for _ in range(col_num)] # to from array columns instead of list ones
-        return datatable.DataTable(data,column_names=columns,transposed=True)
+        return datatable.DataTable(data,column_names=columns,transposed=True,force_copy=force_copy)
     else:
         if len(data)==0:
             data=np.zeros(0,col_num or 0)
@@ -321,7 +605,7 @@ def columns_to_table(data, columns=None, out_type="table"):
     return data
 
 
-def load_table(f, dtype="numeric", columns=None, out_type="table", delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None):
+def load_table(f, dtype="numeric", columns=None, out_type="table", delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None, engine="auto"):
     """
     Load table from the file stream `f`.
     
@@ -344,5 +628,26 @@ def load_table(f, dtype="numeric", columns=None, out_type="table", delimiters=_t
             col_num=columns
         dtype=funcargparse.as_sequence(dtype,col_num,allowed_type="builtin;nostring",length_conflict_action="error")
     data,comments,corrupted_lines=load_columns(f,dtype,
-                    delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,stop_comment=stop_comment,ignore_corrupted_lines=ignore_corrupted_lines)
-    return columns_to_table(data,columns=columns,out_type=out_type),comments,corrupted_lines
\ No newline at end of file
+                    delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,stop_comment=stop_comment,ignore_corrupted_lines=ignore_corrupted_lines,engine=engine)
+    return columns_to_table(data,columns=columns,out_type=out_type),comments,corrupted_lines
+
+
+def iter_table(f, dtype="numeric", columns=None, out_type="table", chunk_size=10000, delimiters=_table_delimiters, empty_entry_substitute=None, ignore_corrupted_lines=True, stop_comment=None, engine="auto"):
+    """
+    Iterate over table chunks from the file stream `f`.
+    
+    Arguments are the same as in :func:`iter_columns` and :func:`columns_to_table`.
+    
+    Yields:
+        tuple: ``(table, comments, corrupted_lines)``, where `table` contains `chunk_size` rows (the last chunk can be shorter),
+        and `comments` and `corrupted_lines` are the ones encountered since the previous chunk.
+    """
+    if columns is not None:
+        if funcargparse.is_sequence(columns,"builtin;nostring"):
+            col_num=len(columns)
+        else:
+            col_num=columns
+        dtype=funcargparse.as_sequence(dtype,col_num,allowed_type="builtin;nostring",length_conflict_action="error")
+    for data,comments,corrupted_lines in iter_columns(f,dtype,chunk_size=chunk_size,
+                    delimiters=delimiters,empty_entry_substitute=empty_entry_substitute,stop_comment=stop_comment,ignore_corrupted_lines=ignore_corrupted_lines,engine=engine):
+        yield columns_to_table(data,columns=columns,out_type=out_type),comments,corrupted_lines
@@ -307,6 +307,92 @@ class TableBinaryOutputFileFormat(IBinaryOutputFileFormat):
             location_file.close()
         else:
             raise ValueError("Can't save data {}".format(data))
+
+
+
+class TableBinaryFileAppender(object):
+    """
+    Binary table file which can be extended by appending rows.
+    
+    The file is stored in the same way as with the ``'bin_desc'`` output format of :func:`save`:
+    the binary data is written into a separate file, and the description file at `path` contains the preamble (see :meth:`TableBinaryOutputFileFormat.get_preamble`).
+    The data file is kept open, and every appended block of rows is written in a single operation, after which the row count in the description file is updated in place.
+    Hence, the table can be read at any moment using :func:`.loadfile.load` on the description file.
+    
+    Can be used as a context manager, which closes the files on exit.
+    
+    Args:
+        path (str): Path to the description file.
+        columns: Either a number of columns, or a list of column names.
+        dtype: :class:`numpy.dtype` describing the data.
+        loc (str): Location type.
+    """
+    _nrows_path=("data","preamble","nrows")
+    _nrows_line="{}\t{:020d}\n" # fixed width to allow for in-place updates
+    def __init__(self, path="", columns=1, dtype=">f8", loc="file"):
+        object.__init__(self)
+        self.output_format=TableBinaryOutputFileFormat(dtype=dtype)
+        if isinstance(columns,int):
+            self.ncols,columns=columns,None
+        else:
+            self.ncols=len(columns)
+        self.nrows=0
+        loc=location.get_location(loc,path)
+        self.data_file=location.LocationFile(loc,location.LocationName("data","bin"))
+        self.data_file.open(mode="write",data_type="binary")
+        self.desc_file=location.LocationFile(loc)
+        self._write_description(columns)
+        self.desc_file.open(mode="update",data_type="binary")
+    def _write_description(self, columns):
+        desc_format=DictionaryOutputFileFormat()
+        d=dictionary.Dictionary()
+        preamble=self.output_format.get_preamble(self.data_file,np.zeros((0,self.ncols)))
+        del preamble["nrows"]
+        d.merge_branch(preamble,"data/preamble")
+        d["data/__data_type__"]="table"
+        d["data/__table_type__"]="external"
+        d["data/file_type"]=self.output_format.format_name
+        if columns is not None:
+            d["data/columns"]=list(columns)
+        d["data/file_path"]=self.data_file.get_path()
+        self.desc_file.open(mode="write",data_type="text")
+        self.desc_file.stream.write(self._nrows_line.format("/".join(self._nrows_path),self.nrows))
+        desc_format.write_data(self.desc_file,d)
+        desc_format.write_time(self.desc_file.stream,datetime.datetime.now())
+        self.desc_file.close()
+    def _update_nrows(self):
+        stream=self.desc_file.stream
+        stream.seek(0)
+        stream.write(self._nrows_line.format("/".join(self._nrows_path),self.nrows).encode())
+        stream.flush()
+    
+    def append(self, data):
+        """
+        Append rows to the table.
+        
+        `data` can be a single row (1D array or list) or several rows (:class:`.DataTable`, or 2D numpy array or list).
+        """
+        if not self.data_file.opened:
+            raise IOError("appending to a closed file")
+        data=np.asarray(data)
+        if data.ndim==1:
+            data=data[None,:]
+        if data.ndim!=2 or data.shape[1]!=self.ncols:
+            raise ValueError("appended data shape {} doesn't agree with the number of columns {}".format(data.shape,self.ncols))
+        if len(data):
+            self.output_format.write_table(self.data_file,data)
+            self.data_file.stream.flush()
+            self.nrows+=len(data)
+            self._update_nrows()
+    def close(self):
+        """Close the files."""
+        if self.data_file.opened:
+            self.data_file.close()
+            self.desc_file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
         
         
         
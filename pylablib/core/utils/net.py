@@ -36,6 +36,71 @@ def get_local_addr():
     """Get local IP address."""
     return socket.gethostbyname(socket.gethostname())
 
+
+class RecvBuffer(object):
+    """
+    Socket receive buffer.
+
+    The data is received directly into a preallocated storage (via :meth:`socket.socket.recv_into`),
+    and the data which is not yet requested is kept for the following read operations.
+
+    Args:
+        size (int): Initial storage size (expanded automatically if necessary).
+    """
+    def __init__(self, size=2**16):
+        object.__init__(self)
+        self._buf=bytearray(size)
+        self._start=0
+        self._end=0
+    def __len__(self):
+        return self._end-self._start
+    def clear(self):
+        """Discard all the stored data."""
+        self._start=self._end=0
+
+    def reserve(self, size):
+        """Make sure that at least `size` more bytes can be appended to the stored data, and return writable :class:`memoryview` of this space."""
+        if self._end+size>len(self._buf):
+            l=len(self)
+            if l+size>len(self._buf):
+                buf=bytearray(max(l+size,len(self._buf)*2))
+                buf[:l]=self._buf[self._start:self._end]
+                self._buf=buf
+            else:
+                self._buf[:l]=self._buf[self._start:self._end]
+            self._start,self._end=0,l
+        return memoryview(self._buf)[self._end:self._end+size]
+    def commit(self, size):
+        """Append `size` bytes written into the view returned by :meth:`reserve` to the stored data."""
+        self._end+=size
+    def find(self, sub, start=0, last=False):
+        """
+        Find substring `sub` in the stored data starting from the position `start`.
+
+        If ``last==True``, find the last occurrence; otherwise, find the first one.
+        Return the position of the substring start, or -1 if it is not found.
+        """
+        find=self._buf.rfind if last else self._buf.find
+        pos=find(sub,self._start+start,self._end)
+        return pos-self._start if pos>=0 else -1
+    def pop(self, size=None):
+        """Remove first `size` bytes (all bytes if ``size is None``) from the stored data and return them as a bytes string."""
+        size=len(self) if size is None else min(size,len(self))
+        data=bytes(memoryview(self._buf)[self._start:self._start+size])
+        self._advance(size)
+        return data
+    def pop_into(self, dst):
+        """Remove the stored data into a writable buffer `dst` (as much as fits); return the number of transferred bytes."""
+        size=min(len(dst),len(self))
+        if size:
+            dst[:size]=memoryview(self._buf)[self._start:self._start+size]
+            self._advance(size)
+        return size
+    def _advance(self, size):
+        self._start+=size
+        if self._start==self._end:
+            self._start=self._end=0
+
 class ClientSocket(object):
     """
     A client socket (used to connect to a server socket).
@@ -82,6 +147,7 @@ class ClientSocket(object):
         self.datatype=datatype
         self.decllen_bo=">"
         self.decllen_ll=4
+        self._recv_buffer=RecvBuffer()
         
     def set_wait_callback(self, wait_callback=None):
         """Set callback function for waiting during connecting or sending/receiving."""
@@ -137,6 +203,7 @@ class ClientSocket(object):
             self.sock.close()
         except socket.error:
             pass
+        self._recv_buffer.clear()
         self.connected=False
     def is_connected(self):
         """Check if the connection is opened"""
@@ -151,47 +218,76 @@ class ClientSocket(object):
         """Return IP address and port of the peer socket."""
         return self.sock.getpeername()
         
-    def _recv_wait(self, l):
-        sock_func=lambda: self.sock.recv(l)
+    def _recv_into_wait(self, view):
+        sock_func=lambda: self.sock.recv_into(view)
         try:
-            recvd=_wait_sock_func(sock_func,self.timeout,self.wait_callback)
+            nrecvd=_wait_sock_func(sock_func,self.timeout,self.wait_callback)
         except socket.timeout:
             raise SocketTimeout("timeout while receiving") from None
-        if len(recvd)==0:
+        if nrecvd==0:
             raise SocketError("connection closed while receiving")
-        return recvd
+        return nrecvd
+    def _recv_into_buffer(self, l):
+        nrecvd=self._recv_into_wait(self._recv_buffer.reserve(l))
+        self._recv_buffer.commit(nrecvd)
+        return nrecvd
     def _send_wait(self, msg):
         sock_func=lambda: self.sock.send(py3.as_builtin_bytes(msg))
         return _wait_sock_func(sock_func,self.timeout,self.wait_callback)
     
     def recv_fixedlen(self, l):
         """Receive fixed-length message of length `l`."""
-        chunks=[]
-        lread=0
-        while lread<l:
-            chunks.append(self._recv_wait(l-lread))
-            lread+=len(chunks[-1])
-        buf=b"".join(chunks)
+        if len(self._recv_buffer)>=l:
+            buf=self._recv_buffer.pop(l)
+        else:
+            buf=bytearray(l)
+            self.recv_fixedlen_into(buf)
+            buf=bytes(buf)
         return py3.as_datatype(buf,self.datatype)
+    def recv_fixedlen_into(self, buf, l=None):
+        """
+        Receive fixed-length message directly into a writable buffer `buf` (e.g., ``bytearray`` or a contiguous numpy array).
+
+        `l` specifies the message length in bytes (by default, the whole buffer is filled).
+        Return the received length.
+        """
+        view=memoryview(buf).cast("B")
+        if l is not None:
+            view=view[:l]
+        l=len(view)
+        lread=self._recv_buffer.pop_into(view)
+        while lread<l:
+            lread+=self._recv_into_wait(view[lread:])
+        return l
     def recv_delimiter(self, delim, lmax=None, chunk_l=1024, strict=False):
         """
         Receive a single message ending with a delimiter `delim` (can be several characters, or list several possible delimiter strings).
         
         `lmax` specifies the maximal received length (`None` means no limit).
         `chunk_l` specifies the size of data chunk to be read in one try.
-        If ``strict==False``, keep receiving as much data as possible until a delimiter is found in the end (only works properly if a single line is expected);
-        otherwise, receive the data byte-by-byte and stop as soon as a delimiter is found (equivalent ot setting ``chunk_l=1``).
+        If ``strict==False``, keep receiving until a delimiter is found, and return the data up to the last received delimiter (only works properly if a single line is expected);
+        otherwise, stop at the first delimiter.
+        In both cases, the data received after the delimiter is kept and returned by the following receive operations.
         """
-        buf=b""
         if isinstance(delim, py3.anystring):
             delim=[delim]
         delim=[py3.as_builtin_bytes(d) for d in delim]
-        if strict:
-            chunk_l=1
-        while not any([buf.endswith(d) for d in delim]):
-            buf=buf+self._recv_wait(chunk_l)
-            if (lmax is not None) and len(buf)>lmax:
+        max_delim_l=max([len(d) for d in delim])
+        start=0
+        while True:
+            end=None
+            for d in delim:
+                pos=self._recv_buffer.find(d,start,last=not strict)
+                if pos>=0 and (end is None or (pos+len(d)<end if strict else pos+len(d)>end)):
+                    end=pos+len(d)
+            if end is not None:
+                buf=self._recv_buffer.pop(end)
+                break
+            if (lmax is not None) and len(self._recv_buffer)>lmax:
+                buf=self._recv_buffer.pop()
                 break
+            start=max(len(self._recv_buffer)-max_delim_l+1,0)
+            self._recv_into_buffer(chunk_l)
         return py3.as_datatype(buf,self.datatype)
     def recv_decllen(self):
         """
@@ -202,6 +298,27 @@ class ClientSocket(object):
         len_msg=self.recv_fixedlen(self.decllen_ll)
         l=strpack.unpack_uint(len_msg,self.decllen_bo)
         return self.recv_fixedlen(l)
+    def recv_decllen_array(self, dtype="u1", out=None):
+        """
+        Receive variable-length message (prepended by its length) directly into a numpy array.
+
+        If `out` is ``None``, allocate a new 1D array with the given `dtype`; otherwise, use `out` (should be a contiguous array large enough to hold the message).
+        Return the array with the received data (a view of `out` with the message length, if `out` is supplied).
+        """
+        import numpy as np
+        len_msg=self.recv_fixedlen(self.decllen_ll)
+        l=strpack.unpack_uint(len_msg,self.decllen_bo)
+        if out is None:
+            dtype=np.dtype(dtype)
+            if l%dtype.itemsize:
+                raise SocketError("message length {} is not a multiple of the item size {}".format(l,dtype.itemsize))
+            out=np.empty(l//dtype.itemsize,dtype=dtype)
+        else:
+            if out.nbytes<l or l%out.itemsize:
+                raise SocketError("message length {} does not fit into the supplied array".format(l))
+            out=out.reshape(-1)[:l//out.itemsize]
+        self.recv_fixedlen_into(out)
+        return out
     def recv(self, l=None):
         """
         Receive a message using the default method.
@@ -217,14 +334,13 @@ class ClientSocket(object):
         `chunk_l` specifies the size of data chunk to be read in one try.
         For technical reasons, use 1ms timeout (i.e., this operation takes 1ms).
         """
-        buf=b""
         with self.using_timeout(1E-3):
             try:
                 while True:
-                    buf+=self._recv_wait(chunk_l)
+                    self._recv_into_buffer(chunk_l)
             except SocketTimeout:
                 pass
-        return py3.as_datatype(buf,self.datatype)
+        return py3.as_datatype(self._recv_buffer.pop(),self.datatype)
     def recv_ack(self, l=None):
         """Receive a message using the default method and send an acknowledgement (message length)."""
         msg=self.recv(l=l)